@@ -0,0 +1,207 @@
+"""Offline benchmark: check a generated URL list against the local stand-in.
+
+    python -m bench.run --urls 100000 --hosts 5000 --profile mixed --output bench.json
+
+The stand-in server runs in its own process, so the numbers below belong to
+the checker alone: URLs/s, p50/p99 check latency, CPU time and peak RSS of
+this process and of the --workers processes. Results are written as JSON
+so runs can be compared across commits. Linux only (it needs the whole
+127.0.0.0/8 loopback range).
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+import yaml
+from core.chunk_reader import ChunkReader
+from core.dedup import Deduplicator
+from core.logger import Logger
+from core.output_writer import OutputWriter
+from core.sharding import ShardedRunner
+from core.verifier import URLVerifier
+from .server import PROFILES, host_address, kind_for, serve_forever
+
+# Settings that would make repeated runs measure something else.
+BENCH_CONFIG = {"result_store": None, "structured_output": "jsonl", "metrics_port": None, "log_file": None}
+
+
+def generate(path, urls, hosts, weights, http_port, https_port, seed=0):
+    """Write `urls` lines spread uniformly over `hosts` virtual hosts."""
+    origins = []
+    for index in range(hosts):
+        if kind_for(index, weights) == "tls" and https_port:
+            origins.append(f"https://{host_address(index)}:{https_port}/page/")
+        else:
+            origins.append(f"http://{host_address(index)}:{http_port}/page/")
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for start in range(0, urls, 10000):
+            f.write("".join(f"{origins[rng.randrange(hosts)]}{i}\n" for i in range(start, min(start + 10000, urls))))
+
+
+def no_browser():
+    raise RuntimeError("no browser in benchmarks")
+
+
+async def check(config, url_file, output_dir, workers):
+    """Run reader -> verifier -> writer like main.py; returns (seconds, metrics snapshot, results written)."""
+    logger = Logger(level="error", quiet=True)
+    deduplicator = None
+    if config.get('dedup'):
+        deduplicator = Deduplicator(config['dedup'], capacity=config.get('dedup_capacity', 1 << 16),
+                                    error_rate=config.get('dedup_error_rate', 0.001))
+    writer = OutputWriter(output_dir, structured_format=config['structured_output'],
+                          buffer_size=config.get('output_buffer_size', 1000),
+                          flush_interval=config.get('output_flush_interval', 1.0))
+    urls = ChunkReader(url_file, config['chunk_size']).read_urls()
+    started = time.perf_counter()
+    async with writer:
+        if workers > 1:
+            verifier = URLVerifier.from_config(config, logger, dns_cache=None, circuit_breaker=None,
+                                               concurrency_limiter=None, deduplicator=deduplicator)
+            verifier.report_summary = False
+            runner = ShardedRunner(config, workers, verifier)
+            await runner.process_stream(urls, writer)
+            snapshot = runner.metrics_snapshot()
+        else:
+            verifier = URLVerifier.from_config(config, logger, deduplicator=deduplicator, browser_factory=no_browser)
+            verifier.report_summary = False
+            async with verifier:
+                await verifier.process_stream(urls, writer)
+            snapshot = verifier.metrics.snapshot() if verifier.metrics else None
+    elapsed = time.perf_counter() - started
+    if verifier.dns_cache:
+        await verifier.dns_cache.shutdown()
+    logger.close()
+    return elapsed, snapshot, dict(writer.written)
+
+
+def latencies(results_file):
+    """p50/p90/p99/max of the latency recorded for every checked URL."""
+    values = array('d')
+    with open(results_file, encoding='utf-8') as f:
+        for line in f:
+            latency = json.loads(line).get("latency")
+            if latency is not None:
+                values.append(latency)
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))], 4)
+    return {"count": len(values), "p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": round(values[-1], 4)}
+
+
+def peak_rss_mb(usage):
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return round(usage.ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the checker against a local fault-injecting server.")
+    parser.add_argument("--urls", type=int, default=10000, help="Number of URLs to generate")
+    parser.add_argument("--hosts", type=int, default=2000, help="Number of virtual hosts")
+    parser.add_argument("--profile", default="mixed", choices=sorted(PROFILES), help="Mix of host behaviours")
+    parser.add_argument("--latency", default="lognormal:0.05:0.5",
+                        help="Server latency: fixed:S, uniform:LOW:HIGH, exponential:MEAN or lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--slow-seconds", type=float, default=30, help="How long slow hosts stay silent")
+    parser.add_argument("--workers", type=int, default=1, help="Checker worker processes, as in main.py")
+    parser.add_argument("--config", default="config.yaml", help="Base config file")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a config setting (YAML value), e.g. --set concurrency=200")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the URL list")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.config, 'r') as f:
+        config = {**yaml.safe_load(f), **BENCH_CONFIG}
+    overrides = {}
+    for setting in args.set:
+        key, _, value = setting.partition("=")
+        overrides[key] = config[key] = yaml.safe_load(value)
+    weights = PROFILES[args.profile]
+
+    with tempfile.TemporaryDirectory(prefix="linkcheck-bench-") as tmp:
+        context = multiprocessing.get_context("spawn")
+        ready = context.Queue()
+        server = context.Process(target=serve_forever, name="stand-in", daemon=True,
+                                 args=(weights, args.latency, args.slow_seconds, tmp, ready))
+        server.start()
+        try:
+            http_port, https_port = ready.get(timeout=30)
+            url_file = Path(tmp) / "urls.txt"
+            generate(url_file, args.urls, args.hosts, weights, http_port, https_port, args.seed)
+            output_dir = Path(tmp) / "results"
+            output_dir.mkdir()
+
+            before, children_before = os.times(), resource.getrusage(resource.RUSAGE_CHILDREN)
+            elapsed, snapshot, written = asyncio.run(check(config, url_file, output_dir, args.workers))
+            after, children = os.times(), resource.getrusage(resource.RUSAGE_CHILDREN)
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+        finally:
+            # Measured before the server is reaped, so its CPU time is never counted.
+            server.terminate()
+            server.join()
+        latency = latencies(output_dir / "results.jsonl")
+
+    checked = written[True] + written[False]
+    report = {
+        "commit": git_commit(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {
+            "urls": args.urls, "hosts": args.hosts, "profile": args.profile, "weights": weights,
+            "latency": args.latency, "slow_seconds": args.slow_seconds, "workers": args.workers,
+            "seed": args.seed, "tls": https_port is not None,
+            "config": {key: config.get(key) for key in ("concurrency", "per_host_concurrency", "per_host_rate",
+                                                        "timeout", "max_retries", "dedup")} | overrides
+        },
+        "results": {
+            "checked": checked, "ok": written[True], "failed": written[False],
+            "seconds": round(elapsed, 3), "urls_per_second": round(checked / elapsed, 1) if elapsed else None,
+            "latency": latency
+        },
+        "resources": {
+            "cpu_user": round(after.user - before.user, 3),
+            "cpu_system": round(after.system - before.system, 3),
+            "workers_cpu_user": round(children.ru_utime - children_before.ru_utime, 3),
+            "workers_cpu_system": round(children.ru_stime - children_before.ru_stime, 3),
+            "peak_rss_mb": peak_rss_mb(usage),
+            "workers_peak_rss_mb": peak_rss_mb(children) if args.workers > 1 else None
+        },
+        "metrics": snapshot
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding='utf-8')
+        results = report["results"]
+        print(f"{checked} URLs in {results['seconds']}s ({results['urls_per_second']}/s), "
+              f"p50 {latency.get('p50')}s, p99 {latency.get('p99')}s, peak RSS {report['resources']['peak_rss_mb']} MB")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
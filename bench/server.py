@@ -0,0 +1,147 @@
+"""Local stand-in for the web: thousands of virtual hosts with injected faults.
+
+Every host is an address in 127.0.0.0/8 (127.1.0.0, 127.1.0.1, ...), so no
+DNS is involved and each host gets its own connection pool and per-host
+limits, exactly like real websites. How a host behaves is derived from its
+index and the profile's weights, so the URL generator and the server agree
+without sharing any state.
+"""
+import asyncio
+import math
+import random
+import shutil
+import ssl
+import subprocess
+from pathlib import Path
+from aiohttp import web
+
+# Fraction of hosts of each kind. Digits are plain status codes.
+PROFILES = {
+    "fast": {"ok": 1.0},
+    "mixed": {"ok": 0.80, "404": 0.04, "500": 0.02, "503": 0.01, "redirect": 0.03, "head_reject": 0.04,
+              "reset": 0.02, "slow": 0.01, "tls": 0.03},
+    "faulty": {"ok": 0.50, "404": 0.10, "500": 0.05, "head_reject": 0.10, "reset": 0.10, "slow": 0.05, "tls": 0.10},
+}
+
+
+def host_address(index):
+    """IP address of virtual host number `index`."""
+    return f"127.{1 + index // 65536}.{index // 256 % 256}.{index % 256}"
+
+
+def host_index(address):
+    parts = [int(part) for part in address.split(".")]
+    return (parts[1] - 1) * 65536 + parts[2] * 256 + parts[3]
+
+
+def kind_for(index, weights):
+    """Deterministically pick a host kind from the profile weights."""
+    point = (index * 2654435761 % 2 ** 32) / 2 ** 32 * sum(weights.values())
+    for kind in sorted(weights):
+        point -= weights[kind]
+        if point < 0:
+            return kind
+    return sorted(weights)[-1]
+
+
+def latency_sampler(spec):
+    """Parse "fixed:S", "uniform:LOW:HIGH", "exponential:MEAN" or "lognormal:MEDIAN:SIGMA" (seconds)."""
+    name, *args = spec.split(":")
+    args = [float(arg) for arg in args]
+    if name == "fixed":
+        return lambda: args[0]
+    if name == "uniform":
+        return lambda: random.uniform(args[0], args[1])
+    if name == "exponential":
+        return lambda: random.expovariate(1 / args[0]) if args[0] else 0
+    if name == "lognormal":
+        mu = math.log(args[0])
+        return lambda: random.lognormvariate(mu, args[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def self_signed_cert(directory):
+    """Create a throwaway certificate with the openssl CLI; None if openssl is not installed."""
+    if not shutil.which("openssl"):
+        return None
+    cert, key = Path(directory) / "cert.pem", Path(directory) / "key.pem"
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", str(key), "-out", str(cert),
+                    "-days", "1", "-subj", "/CN=bench.test"], check=True, capture_output=True)
+    return cert, key
+
+
+class StandIn:
+    """aiohttp app answering every virtual host according to its kind.
+
+    ok: 200 after the sampled latency. A status code: that status.
+    redirect: a 302 to /landing on the same host. head_reject: 403 to HEAD,
+    200 to GET. reset: the connection is dropped without a response.
+    slow: nothing is sent for `slow_seconds` (slow-loris). tls: like ok,
+    served on the HTTPS port.
+    """
+
+    def __init__(self, weights, latency="fixed:0", slow_seconds=30):
+        self.weights = weights
+        self.latency = latency_sampler(latency)
+        self.slow_seconds = slow_seconds
+        self.requests = 0
+
+    def app(self):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self.handle)
+        return app
+
+    async def handle(self, request):
+        self.requests += 1
+        try:
+            kind = kind_for(host_index(request.host.rsplit(":", 1)[0]), self.weights)
+        except (ValueError, IndexError):
+            kind = "ok"
+        if kind == "slow":
+            await asyncio.sleep(self.slow_seconds)
+        elif kind == "reset":
+            request.transport.abort()
+            raise asyncio.CancelledError()
+        delay = self.latency()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if kind.isdigit():
+            return web.Response(status=int(kind))
+        if kind == "head_reject" and request.method == "HEAD":
+            return web.Response(status=403)
+        if kind == "redirect" and request.path != "/landing":
+            raise web.HTTPFound("/landing")
+        if request.headers.get("Range") == "bytes=0-0":
+            return web.Response(status=206, body=b"o", headers={"Content-Range": "bytes 0-0/2"})
+        return web.Response(text="ok")
+
+
+async def start(stand_in, tls_dir=None):
+    """Serve a StandIn; returns (runner, http port, https port or None)."""
+    runner = web.AppRunner(stand_in.app(), access_log=None, handle_signals=False)
+    await runner.setup()
+    # Every 127.x.y.z address must be answered, so listen on all interfaces.
+    http = web.TCPSite(runner, "0.0.0.0", 0, backlog=4096)
+    await http.start()
+    https_port = None
+    cert = self_signed_cert(tls_dir) if tls_dir else None
+    if cert:
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(*cert)
+        https = web.TCPSite(runner, "0.0.0.0", 0, ssl_context=context, backlog=4096)
+        await https.start()
+        https_port = https._server.sockets[0].getsockname()[1]
+    return runner, http._server.sockets[0].getsockname()[1], https_port
+
+
+def serve_forever(weights, latency, slow_seconds, tls_dir, ready):
+    """Process entry point: start the stand-in, report its ports on `ready`, run until terminated."""
+    async def run():
+        runner, http_port, https_port = await start(StandIn(weights, latency, slow_seconds), tls_dir)
+        ready.put((http_port, https_port))
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
\ No newline at end of file
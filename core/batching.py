@@ -0,0 +1,41 @@
+import asyncio
+
+
+async def ready_batches(items, size):
+    """Group an async iterable into lists of up to `size` items.
+
+    A list is handed on as soon as it is full or no further item is ready
+    yet, so a slow or idle source (such as the service's job feed) never
+    leaves items waiting for a batch to fill up. Items are read ahead by at
+    most `size`.
+    """
+    queue = asyncio.Queue(maxsize=size)
+    end = object()
+    error = None
+
+    async def pump():
+        nonlocal error
+        try:
+            async for item in items:
+                await queue.put(item)
+        except Exception as e:
+            error = e
+        await queue.put(end)
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < size and not queue.empty():
+                batch.append(queue.get_nowait())
+            finished = batch[-1] is end
+            if finished:
+                batch.pop()
+            if batch:
+                yield batch
+            if finished:
+                break
+        if error:
+            raise error
+    finally:
+        task.cancel()
\ No newline at end of file
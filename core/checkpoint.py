@@ -0,0 +1,105 @@
+import asyncio
+import heapq
+import json
+import os
+import time
+from pathlib import Path
+
+
+class Checkpoint:
+    """Track input progress and periodically persist it for --resume.
+
+    The checkpoint records the input byte offset below which every URL has
+    a result on disk, the offset the input has been read up to, the URLs
+    in between that are still in flight (every other line there is done),
+    and the size of each output file at that moment. However far a slow
+    URL holds the first offset back, the checkpoint only grows with the
+    number of URLs in flight. It is
+    taken together with an OutputWriter flush (see OutputWriter.sync), so
+    resuming can cut the output files back to those sizes and carry on
+    without losing or duplicating a result.
+    """
+
+    FILE_NAME = "checkpoint.json"
+
+    def __init__(self, output_dir, input_file, interval=5, position=None):
+        self.path = Path(output_dir) / self.FILE_NAME
+        # "-" is stdin: resuming reads it again and skips what was done.
+        self.input_file = input_file if input_file == "-" else str(Path(input_file).resolve())
+        self.interval = interval
+        self.position = position
+        self._in_flight = {}
+        self._heap = []
+        self._last_started = -1
+        # From the checkpoint being resumed: lines below _read_to are done unless in _redo.
+        self._read_to = 0
+        self._redo = {}
+
+    @classmethod
+    def load(cls, output_dir):
+        """Return the saved checkpoint state of an output directory."""
+        path = Path(output_dir) / cls.FILE_NAME
+        if not path.exists():
+            raise FileNotFoundError(f"No {cls.FILE_NAME} in {output_dir}; nothing to resume")
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def resume_from(self, state):
+        """Skip the lines a previous run already finished."""
+        self._read_to = state.get("read_to", state["offset"])
+        self._redo = {offset: url for offset, url in state.get("in_flight", [])}
+
+    async def track(self, entries):
+        """Pass (offset, url) pairs through, recording them as in flight."""
+        async for offset, url in entries:
+            if offset < self._read_to and self._redo.pop(offset, None) is None:
+                continue
+            self._in_flight[offset] = url
+            heapq.heappush(self._heap, offset)
+            self._last_started = offset
+            yield offset, url
+
+    @property
+    def in_flight(self):
+        """Number of input lines read but not yet finished."""
+        return len(self._in_flight)
+
+    def done(self, job):
+        """Record that a job's result has been handed to the writer."""
+        if job.offset is not None:
+            self._in_flight.pop(job.offset, None)
+
+    def snapshot(self):
+        while self._heap and self._heap[0] not in self._in_flight:
+            heapq.heappop(self._heap)
+        read_to = self.position() if self.position else self._last_started + 1
+        watermark = min(self._heap[:1] + [read_to, min(self._redo, default=read_to)])
+        return {
+            "input": self.input_file,
+            "offset": watermark,
+            "read_to": max(read_to, self._read_to),
+            "in_flight": [[offset, url] for offset, url in self._in_flight.items()] +
+                         [[offset, url] for offset, url in self._redo.items()],
+            "saved_at": time.time()
+        }
+
+    async def save(self, output_writer, complete=False):
+        """Flush the writer and persist a consistent checkpoint."""
+        state, sizes = await output_writer.sync(self.snapshot)
+        state["files"] = sizes
+        state["complete"] = complete
+        await asyncio.to_thread(self._write, state)
+
+    async def run(self, output_writer):
+        """Save a checkpoint every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save(output_writer)
+
+    def _write(self, state):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
\ No newline at end of file
@@ -1,16 +1,206 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import mmap
+import os
+import sys
+from contextlib import ExitStack
+
+FORMATS = ("plain", "csv", "jsonl")
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class Cursor:
+    """How far one read_urls() call has got: `position` is the offset just past the last line read."""
+
+    def __init__(self, position=0):
+        self.position = position
+
+
 class ChunkReader:
-    def __init__(self, input_file, chunk_size):
+    """Stream URLs from a file or stdin ("-") without blocking the event loop.
+
+    The input may be plain text (one URL per line), CSV or JSON lines, where
+    `url_column` names the field holding the URL (for CSV a column index
+    means there is no header row), and may be gzip- or zstd-compressed
+    (zstd needs the zstandard package). The format is guessed from the file
+    name unless `input_format` is given. The file is read in `block_size`
+    blocks on a worker thread, one block ahead of the consumer. Offsets are
+    byte offsets of lines in the (decompressed) input.
+    """
+
+    def __init__(self, input_file, chunk_size, input_format=None, url_column="url", block_size=1 << 20):
+        input_format = input_format or self.guess_format(input_file)
+        if input_format not in FORMATS:
+            raise ValueError(f"Unknown input format: {input_format}")
         self.input_file = input_file
         self.chunk_size = chunk_size
+        self.input_format = input_format
+        self.url_column = url_column
+        self.block_size = block_size
+        self.position = 0
+        self.skipped = 0
+
+    @staticmethod
+    def guess_format(input_file):
+        name = str(input_file).lower().removesuffix(".gz").removesuffix(".zst")
+        if name.endswith(".csv"):
+            return "csv"
+        if name.endswith((".jsonl", ".ndjson")):
+            return "jsonl"
+        return "plain"
 
     async def read_chunks(self):
-        """Stream-read URLs in chunks."""
-        with open(self.input_file, 'r', encoding='utf-8') as f:
-            chunk = []
-            for line in f:
-                chunk.append(line.strip())
-                if len(chunk) >= self.chunk_size:
-                    yield chunk
-                    chunk = []
-            if chunk:
-                yield chunk
\ No newline at end of file
+        """Stream-read URLs in lists of up to `chunk_size`."""
+        chunk = []
+        async for url in self.read_urls():
+            chunk.append(url)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def read_urls(self, start=0, with_offsets=False, end=None, cursor=None):
+        """Stream-read URLs one at a time, skipping blank lines.
+
+        Reading starts at byte offset `start`, which must be a line start, and
+        stops at `end` (see split()). With `with_offsets`, yields (byte offset
+        of the line, URL) pairs. The `position` of `cursor` (by default the
+        reader itself) is kept at the offset just past the last line read;
+        reads that run at the same time each need their own Cursor.
+        """
+        loop = asyncio.get_running_loop()
+        cursor = cursor or self
+        cursor.position = start
+        blocks = self._blocks(start, end)
+        pending = loop.run_in_executor(None, next, blocks, None)
+        try:
+            while True:
+                block = await pending
+                if block is None:
+                    break
+                pending = loop.run_in_executor(None, next, blocks, None)
+                entries, block_end = block
+                for i, entry in enumerate(entries):
+                    cursor.position = entries[i + 1][0] if i + 1 < len(entries) else block_end
+                    yield entry if with_offsets else entry[1]
+                cursor.position = block_end
+        finally:
+            # Closing while the worker thread is still inside the generator would fail.
+            if not pending.cancelled():
+                try:
+                    await pending
+                except Exception:
+                    pass
+                blocks.close()
+
+    def split(self, parts):
+        """Cut an uncompressed input file into up to `parts` (start, end) byte ranges on line boundaries.
+
+        Each range can be read with read_urls(start, end=end, cursor=Cursor()),
+        several at a time on the same reader.
+        """
+        if self.input_file == "-":
+            raise ValueError("stdin can't be split")
+        with open(self.input_file, 'rb') as f:
+            if f.read(4).startswith((GZIP_MAGIC, ZSTD_MAGIC)):
+                raise ValueError(f"{self.input_file} is compressed and can't be split")
+            size = os.fstat(f.fileno()).st_size
+            if not size:
+                return []
+            bounds = [0]
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for i in range(1, parts):
+                    newline = data.find(b"\n", max(size * i // parts - 1, bounds[-1]))
+                    bounds.append(size if newline < 0 else newline + 1)
+            bounds.append(size)
+        return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+    def _open(self, stack):
+        """Open the input as a binary stream, decompressing it if needed."""
+        if self.input_file == "-":
+            raw = sys.stdin.buffer
+        else:
+            raw = stack.enter_context(open(self.input_file, 'rb'))
+        magic = raw.peek(4)[:4]
+        if magic.startswith(GZIP_MAGIC):
+            return stack.enter_context(gzip.GzipFile(fileobj=raw))
+        if magic == ZSTD_MAGIC:
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("Reading zstd input needs the zstandard package: pip install zstandard") from None
+            return stack.enter_context(io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw)))
+        return raw
+
+    def _blocks(self, start, end):
+        """Yield ([(offset, URL), ...], offset past the block) for each block read."""
+        with ExitStack() as stack:
+            f = self._open(stack)
+            column = None
+            position = 0
+            if self.input_format == "csv":
+                column = self.url_column
+                if not isinstance(column, int):
+                    header = f.readline()
+                    position = len(header)
+                    names = next(csv.reader([header.decode('utf-8', errors='replace')]), [])
+                    if column not in names:
+                        raise ValueError(f"No {column!r} column in {self.input_file}")
+                    column = names.index(column)
+            start = max(start, position)
+            if start > position:
+                if f is not sys.stdin.buffer and f.seekable():
+                    f.seek(start)
+                else:
+                    while position < start:
+                        skipped = f.read(min(self.block_size, start - position))
+                        if not skipped:
+                            return
+                        position += len(skipped)
+            position = start
+            rest = b""
+            while end is None or position + len(rest) < end:
+                size = self.block_size if end is None else min(self.block_size, end - position - len(rest))
+                block = f.read(size)
+                if not block:
+                    break
+                data = rest + block
+                cut = data.rfind(b"\n") + 1
+                if not cut:
+                    rest = data
+                    continue
+                yield self._parse(data[:cut], position, column), position + cut
+                position += cut
+                rest = data[cut:]
+            if rest:
+                yield self._parse(rest, position, column), position + len(rest)
+
+    def _parse(self, data, offset, column):
+        entries = []
+        for line in data.split(b"\n"):
+            text = line.strip()
+            if text:
+                url = self._url(text.decode('utf-8', errors='replace'), column)
+                if url:
+                    entries.append((offset, url))
+                else:
+                    self.skipped += 1
+            offset += len(line) + 1
+        return entries
+
+    def _url(self, text, column):
+        if self.input_format == "plain":
+            return text
+        try:
+            if self.input_format == "csv":
+                value = next(csv.reader([text]))[column]
+            else:
+                value = json.loads(text)[self.url_column]
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+        return value.strip() if isinstance(value, str) else None
\ No newline at end of file
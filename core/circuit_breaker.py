@@ -0,0 +1,113 @@
+import time
+from urllib.parse import urlparse
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def origin_key(url):
+    """Return scheme://host:port for a URL, filling in the default port."""
+    try:
+        parsed = urlparse(url)
+        port = parsed.port or DEFAULT_PORTS.get(parsed.scheme)
+    except ValueError:
+        return ""
+    return f"{parsed.scheme}://{(parsed.hostname or '').lower()}:{port}"
+
+
+class Circuit:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.reason = None
+        self.opened_at = 0
+        self.probe_started = None
+
+
+class CircuitBreaker:
+    """Per-origin circuit breaker for connection and timeout failures.
+
+    After `failure_threshold` consecutive failures an origin's circuit opens
+    and allow() turns requests away. Once `cooldown` seconds have passed a
+    single probe request is let through (half-open): a response closes the
+    circuit again, another failure re-opens it for a further cooldown.
+
+    At most about `max_origins` origins are tracked: when that many have
+    failed, the older half of those whose circuit is still closed (a few
+    failures, never tripped) are forgotten.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=60, max_origins=100000):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_origins = max_origins
+        self._circuits = {}
+        self.opened = 0
+        self.short_circuited = 0
+
+    def allow(self, origin):
+        """Return None if a request to the origin may go ahead, else the reason it may not."""
+        circuit = self._circuits.get(origin)
+        if circuit is None or circuit.state == CLOSED:
+            return None
+        now = time.monotonic()
+        if circuit.state == OPEN and now - circuit.opened_at >= self.cooldown:
+            circuit.state = HALF_OPEN
+        if circuit.state == HALF_OPEN and (circuit.probe_started is None or now - circuit.probe_started >= self.cooldown):
+            circuit.probe_started = now
+            return None
+        self.short_circuited += 1
+        return f"{origin} is down after {circuit.failures} consecutive failures, last: {circuit.reason}"
+
+    def record_success(self, origin):
+        """The origin answered; close its circuit."""
+        self._circuits.pop(origin, None)
+
+    def record_failure(self, origin, reason):
+        """Count a connection or timeout failure against the origin."""
+        circuit = self._circuits.get(origin)
+        if circuit is None:
+            if len(self._circuits) >= self.max_origins:
+                self._forget_closed()
+            circuit = self._circuits[origin] = Circuit()
+        circuit.failures += 1
+        circuit.reason = reason
+        if circuit.state == HALF_OPEN or (circuit.state == CLOSED and circuit.failures >= self.failure_threshold):
+            if circuit.state == CLOSED:
+                self.opened += 1
+            circuit.state = OPEN
+            circuit.opened_at = time.monotonic()
+            circuit.probe_started = None
+
+    def _forget_closed(self):
+        # Dicts keep insertion order: the first closed ones are the oldest.
+        closed = [origin for origin, circuit in self._circuits.items() if circuit.state == CLOSED]
+        for origin in closed[:max(1, len(closed) // 2)]:
+            del self._circuits[origin]
+
+    def state(self, origin):
+        circuit = self._circuits.get(origin)
+        return circuit.state if circuit else CLOSED
+
+    def stats(self):
+        """Counters and tripped origins as plain data, e.g. to merge across processes."""
+        return {
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+            "tripped": [[origin, c.state, c.failures, c.reason] for origin, c in self._circuits.items() if c.state != CLOSED]
+        }
+
+    def summary(self, limit=10, stats=None):
+        """Return a summary line plus one line per (at most `limit`) tripped origin."""
+        stats = stats or self.stats()
+        tripped = sorted(stats["tripped"], key=lambda item: item[2], reverse=True)
+        lines = [f"Circuit breaker: {len(tripped)} origins open or half-open, "
+                 f"{stats['opened']} circuits opened, {stats['short_circuited']} URLs short-circuited"]
+        for origin, state, failures, reason in tripped[:limit]:
+            lines.append(f"  {origin} — {state}, {failures} failures, last: {reason}")
+        if len(tripped) > limit:
+            lines.append(f"  ... and {len(tripped) - limit} more")
+        return lines
\ No newline at end of file
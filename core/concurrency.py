@@ -0,0 +1,160 @@
+import asyncio
+import os
+import socket
+import time
+from collections import deque
+import aiohttp
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Connection errors that say nothing about load: the site is gone or refuses us.
+NOT_CONGESTION = (socket.gaierror, ConnectionRefusedError)
+
+
+def open_files():
+    """(open file descriptors, soft limit) of this process, or None where that can't be read."""
+    if resource is None:
+        return None
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            count = len(os.listdir(fd_dir))
+        except OSError:
+            continue
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        return count, soft if soft != resource.RLIM_INFINITY else None
+    return None
+
+
+def is_congestion(exc):
+    """True for a failure that may come from doing too much at once: a timeout or a dropped or failed connection."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    if not isinstance(exc, aiohttp.ClientConnectionError) or isinstance(exc, aiohttp.ClientSSLError):
+        return False
+    return not (isinstance(exc, aiohttp.ClientConnectorError) and isinstance(exc.os_error, NOT_CONGESTION))
+
+
+class AdaptiveLimiter:
+    """Limit on requests in flight that adapts to latency and errors.
+
+    Used like an asyncio.Semaphore (`async with limiter:`). After every
+    `window` requests (or `interval` seconds with at least a few requests)
+    the limit is adjusted, always within [min_limit, max_limit]:
+
+    - more than `max_error_rate` of the requests timed out or lost their
+      connection: cut the limit to `backoff` times its size;
+    - fewer than `fd_reserve` file descriptors are left: same cut;
+    - median latency rose above `tolerance` times its baseline (the lowest
+      median of recent windows): shrink in proportion, like TCP Vegas;
+    - otherwise, if requests had to wait for a slot: grow by `increase`
+      (a fraction of the limit, at least 1).
+
+    Every change and its reason go to `log`; stats() has the current limit,
+    the range it moved in and the last reason.
+    """
+
+    def __init__(self, initial, min_limit=1, max_limit=None, window=50, interval=2.0, max_error_rate=0.05,
+                 tolerance=2.0, backoff=0.75, increase=0.1, fd_reserve=64, log=None):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit or initial * 10)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.window = window
+        self.interval = interval
+        self.max_error_rate = max_error_rate
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.increase = increase
+        self.fd_reserve = fd_reserve
+        self.log = log
+        self.in_flight = 0
+        self.lowest = self.highest = self.limit
+        self.adjustments = 0
+        self.last_reason = None
+        self._waiters = deque()
+        self._started = {}
+        self._latencies = []
+        self._errors = 0
+        self._waited = False
+        self._window_started = time.monotonic()
+        self._baselines = deque(maxlen=20)
+
+    async def __aenter__(self):
+        if self.in_flight >= self.limit or self._waiters:
+            self._waited = True
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except BaseException:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif not waiter.cancelled():
+                    # Given a slot and cancelled at the same time: pass the slot on.
+                    self.in_flight -= 1
+                    self._wake()
+                raise
+        else:
+            self.in_flight += 1
+        self._started[asyncio.current_task()] = time.monotonic()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        started = self._started.pop(asyncio.current_task(), None)
+        self.in_flight -= 1
+        if started is not None:
+            self._latencies.append(time.monotonic() - started)
+            if exc is not None and is_congestion(exc):
+                self._errors += 1
+            self._maybe_adjust()
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _maybe_adjust(self):
+        count = len(self._latencies)
+        if count < self.window and (count < 10 or time.monotonic() - self._window_started < self.interval):
+            return
+        latencies = sorted(self._latencies)
+        p50, p90 = latencies[count // 2], latencies[min(count - 1, count * 9 // 10)]
+        error_rate = self._errors / count
+        baseline = min(self._baselines, default=p50)
+        self._baselines.append(p50)
+        limit, reason = self.limit, None
+        files = open_files() if self.fd_reserve else None
+        headroom = files[1] - files[0] if files and files[1] else None
+        if error_rate > self.max_error_rate:
+            limit = self.limit * self.backoff
+            reason = f"{error_rate:.0%} of requests timed out or lost their connection"
+        elif headroom is not None and headroom < self.fd_reserve:
+            limit = self.limit * self.backoff
+            reason = f"only {headroom} file descriptors left"
+        elif p50 > self.tolerance * baseline:
+            limit = self.limit * max(self.backoff / 2, self.tolerance * baseline / p50)
+            reason = f"median latency {p50 * 1000:.0f}ms is over {self.tolerance:g}x the {baseline * 1000:.0f}ms baseline"
+        elif self._waited or self._waiters:
+            limit = self.limit + max(1, self.limit * self.increase)
+            reason = f"requests were waiting, median latency {p50 * 1000:.0f}ms, p90 {p90 * 1000:.0f}ms"
+        self._latencies = []
+        self._errors = 0
+        self._waited = False
+        self._window_started = time.monotonic()
+        limit = min(max(int(limit), self.min_limit), self.max_limit)
+        if limit != self.limit:
+            if self.log:
+                self.log(f"Concurrency {self.limit} -> {limit}: {reason}")
+            self.limit = limit
+            self.lowest = min(self.lowest, limit)
+            self.highest = max(self.highest, limit)
+            self.adjustments += 1
+            self.last_reason = reason
+
+    def stats(self):
+        return {"limit": self.limit, "lowest": self.lowest, "highest": self.highest,
+                "adjustments": self.adjustments, "last_reason": self.last_reason}
\ No newline at end of file
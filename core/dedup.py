@@ -0,0 +1,274 @@
+import math
+from array import array
+from collections import OrderedDict
+from dataclasses import replace
+from hashlib import blake2b
+from urllib.parse import urlsplit, urlunsplit
+from .circuit_breaker import DEFAULT_PORTS
+from .records import CheckResult
+
+# Failure categories, in the order they are packed into outcome values.
+CATEGORIES = ["dns", "connection", "ssl", "status", "timeout", "client", "circuit", "other"]
+
+
+def canonical_url(url):
+    """Reduce a normalized URL to the form used for duplicate detection.
+
+    Lower-cases scheme and host, drops a leading "www.", default ports,
+    trailing slashes and the fragment.
+    """
+    parsed = urlsplit(url)
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    path = parsed.path.rstrip("/") or "/"
+    return urlunsplit((scheme, netloc, path, parsed.query, ""))
+
+
+def fingerprint(url):
+    """Return two independent 64-bit hashes of a URL's canonical form."""
+    digest = blake2b(canonical_url(url).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little") or 1, int.from_bytes(digest[8:], "little") | 1
+
+
+def pack_outcome(result):
+    """Pack ok/status/category into one 32-bit value (never 0)."""
+    category = CATEGORIES.index(result.category) if result.category in CATEGORIES else CATEGORIES.index("other")
+    return 1 | (int(result.ok) << 1) | (category << 2) | ((result.status or 0) & 0xFFFF) << 6
+
+
+def unpack_outcome(value):
+    ok = bool(value & 2)
+    status = (value >> 6) & 0xFFFF or None
+    return ok, status, None if ok else CATEGORIES[(value >> 2) & 0xF]
+
+
+class FingerprintTable:
+    """Open-addressing hash table from 64-bit fingerprints to nonzero 32-bit values.
+
+    Keys and values live in two flat arrays, about 24 bytes per entry at the
+    maximum load factor of 0.5, instead of a dict of Python strings.
+
+    Growing is incremental: the old arrays are kept next to the new ones and
+    each set() moves the next `MIGRATE_STEP` slots across, so no single call
+    rehashes millions of entries while the event loop waits.
+    """
+
+    MIGRATE_STEP = 64
+
+    def __init__(self, capacity=1 << 16):
+        self._old = None
+        self._cursor = 0
+        self._unmigrated = 0
+        self._allocate(1 << max(4, (capacity * 2 - 1).bit_length()))
+
+    def __len__(self):
+        return self._count + self._unmigrated
+
+    def get(self, key):
+        i = self._slot(self._keys, self._mask, key)
+        if self._keys[i]:
+            return self._values[i]
+        if self._old is not None:
+            keys, values, mask = self._old
+            i = self._slot(keys, mask, key)
+            if keys[i] and values[i]:
+                return values[i]
+        return None
+
+    def set(self, key, value):
+        keys = self._keys
+        i = self._slot(keys, self._mask, key)
+        if not keys[i]:
+            keys[i] = key
+            self._count += 1
+            if self._old is not None:
+                self._take_from_old(key)
+        self._values[i] = value
+        if self._old is not None:
+            self._migrate(self.MIGRATE_STEP)
+        if self._count * 2 > len(keys):
+            self._grow()
+
+    @staticmethod
+    def _slot(keys, mask, key):
+        """Index of `key` in `keys`, or of the empty slot where it would go."""
+        i = key & mask
+        while keys[i] and keys[i] != key:
+            i = (i + 1) & mask
+        return i
+
+    def _allocate(self, size):
+        self._keys = array('Q', [0]) * size
+        self._values = array('I', [0]) * size
+        self._mask = size - 1
+        self._count = 0
+
+    def _grow(self):
+        if self._old is not None:
+            self._migrate(len(self._old[0]))
+        self._old = (self._keys, self._values, self._mask)
+        self._cursor = 0
+        self._unmigrated = self._count
+        self._allocate(len(self._keys) * 2)
+
+    def _take_from_old(self, key):
+        # The key was just added to the new arrays: zero its old value so it is neither moved nor counted twice.
+        keys, values, mask = self._old
+        i = self._slot(keys, mask, key)
+        if keys[i] and values[i]:
+            values[i] = 0
+            self._unmigrated -= 1
+
+    def _migrate(self, step):
+        old_keys, old_values, _ = self._old
+        keys, values, mask = self._keys, self._values, self._mask
+        end = min(self._cursor + step, len(old_keys))
+        for i in range(self._cursor, end):
+            # Old keys stay in place (their probe chains must not break); a zero value marks them moved.
+            if old_keys[i] and old_values[i]:
+                j = self._slot(keys, mask, old_keys[i])
+                if not keys[j]:
+                    keys[j] = old_keys[i]
+                    values[j] = old_values[i]
+                    self._count += 1
+                self._unmigrated -= 1
+        self._cursor = end
+        if end == len(old_keys):
+            self._old = None
+            self._unmigrated = 0
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        h1, h2 = key
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class Deduplicator:
+    """Streaming duplicate filter between the reader and the verifier.
+
+    Only the first URL of each canonical form is checked. Later copies wait
+    for its result if it is still in flight, and then get a result line
+    copied from it (method "duplicate").
+
+    In "exact" mode every outcome is kept in a FingerprintTable. In "bloom"
+    mode outcomes go into two Bloom filters (working / not working) sized for
+    `capacity` URLs at `error_rate`, plus an LRU of the most recent outcomes
+    for exact status codes. A Bloom false positive can give a unique URL a
+    copied result; the chance of that per URL is about `error_rate`.
+    """
+
+    def __init__(self, mode="exact", capacity=1 << 16, error_rate=0.001, recent=100000):
+        if mode not in ("exact", "bloom"):
+            raise ValueError(f"Unknown dedup mode: {mode}")
+        self.mode = mode
+        self._waiting = {}
+        self.duplicates = 0
+        if mode == "exact":
+            self._table = FingerprintTable(capacity)
+        else:
+            self._working = BloomFilter(capacity, error_rate)
+            self._not_working = BloomFilter(capacity, error_rate)
+            self._recent = OrderedDict()
+            self.recent_size = recent
+
+    async def filter(self, jobs, output_writer, on_done=None):
+        """Yield only the first job of each canonical URL."""
+        async for job in jobs:
+            key = fingerprint(job.url)
+            waiters = self._waiting.get(key[0])
+            if waiters is not None:
+                waiters.append(job)
+                continue
+            outcome = self._outcome(key)
+            if outcome:
+                await self._write_copy(output_writer, job, outcome, None, on_done)
+                continue
+            self._waiting[key[0]] = []
+            yield job
+
+    def resolving(self, output_writer, on_done=None):
+        """Wrap a writer so each written result is also copied to its waiting duplicates."""
+        return ResolvingWriter(self, output_writer, on_done)
+
+    async def resolve(self, output_writer, result, on_done=None):
+        key = fingerprint(result.url)
+        waiters = self._waiting.pop(key[0], None)
+        if waiters is None:
+            return
+        outcome = pack_outcome(result)
+        self._remember(key, outcome)
+        for job in waiters:
+            await self._write_copy(output_writer, job, outcome, result, on_done)
+
+    def _outcome(self, key):
+        if self.mode == "exact":
+            return self._table.get(key[0])
+        outcome = self._recent.get(key[0])
+        if outcome:
+            self._recent.move_to_end(key[0])
+            return outcome
+        working, not_working = key in self._working, key in self._not_working
+        if working != not_working:
+            return 1 | (int(working) << 1) | (CATEGORIES.index("other") << 2)
+        return None
+
+    def _remember(self, key, outcome):
+        if self.mode == "exact":
+            self._table.set(key[0], outcome)
+            return
+        (self._working if outcome & 2 else self._not_working).add(key)
+        self._recent[key[0]] = outcome
+        if len(self._recent) > self.recent_size:
+            self._recent.popitem(last=False)
+
+    async def _write_copy(self, output_writer, job, outcome, original, on_done):
+        self.duplicates += 1
+        if original is not None:
+            copy = replace(original, url=job.url, method="duplicate", latency=None,
+                           reason=f"duplicate of {original.url}")
+        else:
+            ok, status, category = unpack_outcome(outcome)
+            copy = CheckResult(job.url, ok, status=status, category=category, method="duplicate")
+        await output_writer.write_result(copy)
+        if on_done:
+            on_done(job)
+
+
+class ResolvingWriter:
+    """OutputWriter proxy that resolves waiting duplicates as results arrive."""
+
+    def __init__(self, deduplicator, output_writer, on_done):
+        self._deduplicator = deduplicator
+        self._writer = output_writer
+        self._on_done = on_done
+
+    def __getattr__(self, name):
+        return getattr(self._writer, name)
+
+    async def write_result(self, result):
+        # Copies first: the caller marks the original done right after this returns.
+        if result.url:
+            await self._deduplicator.resolve(self._writer, result, self._on_done)
+        await self._writer.write_result(result)
\ No newline at end of file
@@ -0,0 +1,136 @@
+import asyncio
+import ipaddress
+import socket
+import time
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+from .batching import ready_batches
+
+# getaddrinfo errors that mean "try again later" rather than "does not exist".
+TRANSIENT_ERRORS = (socket.EAI_AGAIN,)
+
+
+def is_ip_literal(host):
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+class DNSCache(AbstractResolver):
+    """Resolver shared across a run with positive and negative TTL caching.
+
+    Wraps another aiohttp resolver (the default one unless `resolver` is
+    given, so tests can plug in a fake). Concurrent lookups of the same host
+    share one query, and hosts that failed to resolve raise straight away
+    until `negative_ttl` expires.
+    """
+
+    def __init__(self, resolver=None, ttl=300, negative_ttl=600, max_entries=100000):
+        self._resolver = resolver
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._positive = {}
+        self._negative = {}
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        error = self.failure(host)
+        if error:
+            self.negative_hits += 1
+            raise socket.gaierror(socket.EAI_NONAME, error)
+        key = (host, family)
+        entry = self._positive.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+        else:
+            entry = await self._lookup(key)
+        return [dict(info, port=port) for info in entry[1]]
+
+    async def close(self):
+        """Sessions come and go; the cache (and inner resolver) outlive them."""
+
+    async def shutdown(self):
+        """Release the inner resolver."""
+        if self._resolver:
+            await self._resolver.close()
+
+    def failure(self, host):
+        """Return the cached resolution error for a host, or None."""
+        entry = self._negative.get(host)
+        if not entry:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._negative[host]
+            return None
+        return entry[1]
+
+    async def prefetch(self, hosts, concurrency=50, family=socket.AF_UNSPEC):
+        """Resolve hosts that are not cached yet, at most `concurrency` at a time."""
+        now = time.monotonic()
+        pending = []
+        for host in set(hosts):
+            if not host or is_ip_literal(host) or self.failure(host):
+                continue
+            entry = self._positive.get((host, family))
+            if entry and entry[0] > now:
+                continue
+            pending.append(host)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def resolve_one(host):
+            async with semaphore:
+                try:
+                    await self._lookup((host, family))
+                except OSError:
+                    pass
+
+        await asyncio.gather(*(resolve_one(host) for host in pending))
+
+    async def prefetching(self, urls, key, batch_size=500, concurrency=50):
+        """Pass URLs through, resolving each batch's unique hosts up front."""
+        async for batch in ready_batches(urls, batch_size):
+            await self.prefetch((key(u) for u in batch), concurrency)
+            for item in batch:
+                yield item
+
+    async def _lookup(self, key):
+        future = self._inflight.get(key)
+        if future:
+            return await asyncio.shield(future)
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        self.misses += 1
+        host, family = key
+        try:
+            if self._resolver is None:
+                self._resolver = DefaultResolver()
+            infos = await self._resolver.resolve(host, 0, family=family)
+        except OSError as e:
+            if not (isinstance(e, socket.gaierror) and e.errno in TRANSIENT_ERRORS):
+                self._store(self._negative, host, (time.monotonic() + self.negative_ttl, str(e) or "Name or service not known"))
+            future.set_exception(e)
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+        entry = (time.monotonic() + self.ttl, infos)
+        self._store(self._positive, key, entry)
+        future.set_result(entry)
+        return entry
+
+    def _store(self, cache, key, entry):
+        if len(cache) >= self.max_entries:
+            now = time.monotonic()
+            for old in [k for k, v in cache.items() if v[0] <= now]:
+                del cache[old]
+            while len(cache) >= self.max_entries * 0.9:
+                del cache[next(iter(cache))]
+        cache[key] = entry
\ No newline at end of file
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from .records import Job
+
+
+@dataclass
+class Escalation:
+    """Returned by URLVerifier.check_url when a URL needs the slow fallbacks.
+
+    The URL leaves the HTTP pass and is checked by the fallback stage
+    (cloudscraper, then a browser) once `delay` seconds have passed.
+    """
+    delay: float = 0
+
+
+class EscalationQueue:
+    """Jobs waiting for the fallback stage, as (due time, Job) pairs.
+
+    At most `maxsize` jobs are held in memory; the rest are spilled to a
+    file in `spill_dir` (the system temporary directory by default) and read
+    back in order once the in-memory ones have been taken. put() never
+    waits, so the HTTP workers never block on the slow fallbacks, and a
+    flood of escalations costs disk space instead of memory.
+    """
+
+    def __init__(self, maxsize=1000, spill_dir=None):
+        self.maxsize = maxsize
+        self.spill_dir = spill_dir
+        self.spilled = 0
+        self._queue = deque()
+        self._file = None
+        self._read_at = 0
+        self._unread = 0
+        self._closed = False
+        self._changed = asyncio.Event()
+
+    def __len__(self):
+        return len(self._queue) + self._unread
+
+    def put(self, due, job):
+        # Once spilling, keep spilling until the file is read back, so jobs stay in order.
+        if self._unread or len(self._queue) >= self.maxsize:
+            self._spill(due, job)
+        else:
+            self._queue.append((due, job))
+        self._changed.set()
+
+    def close(self):
+        """No more jobs are coming: get() returns None once the queue is empty."""
+        self._closed = True
+        self._changed.set()
+
+    async def get(self):
+        while True:
+            if not self._queue and self._unread:
+                self._read_back()
+            if self._queue:
+                return self._queue.popleft()
+            if self._closed:
+                return None
+            self._changed.clear()
+            await self._changed.wait()
+
+    def discard(self):
+        """Remove the spill file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _spill(self, due, job):
+        if self._file is None:
+            self._file = tempfile.NamedTemporaryFile('w+b', dir=self.spill_dir, prefix="escalations-", suffix=".jsonl")
+        self._file.seek(0, 2)
+        self._file.write(json.dumps([due, asdict(job)]).encode('utf-8') + b"\n")
+        self._unread += 1
+        self.spilled += 1
+
+    def _read_back(self):
+        self._file.flush()
+        self._file.seek(self._read_at)
+        for _ in range(min(self.maxsize, self._unread)):
+            due, fields = json.loads(self._file.readline())
+            self._queue.append((due, Job(**fields)))
+            self._unread -= 1
+        self._read_at = self._file.tell()
+        if not self._unread:
+            self._file.seek(0)
+            self._file.truncate()
+            self._read_at = 0
+
+
+def chrome_driver(user_agent=None):
+    """Start a headless undetected-chromedriver Chrome."""
+    import undetected_chromedriver as uc
+    from selenium.webdriver.chrome.options import Options
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    if user_agent:
+        chrome_options.add_argument(f"user-agent={user_agent}")
+    return uc.Chrome(options=chrome_options, enable_cdp_events=True)
+
+
+def cloud_scraper():
+    import cloudscraper
+    return cloudscraper.create_scraper(browser={"browser": "chrome", "platform": "windows", "mobile": False})
+
+
+class ThreadLocalPool:
+    """Thread pool where each thread lazily creates and keeps its own resource."""
+
+    def __init__(self, size, factory, name):
+        self.size = size
+        self.factory = factory
+        self.name = name
+        self._executor = None
+        self._local = threading.local()
+        self._resources = []
+        self._lock = threading.Lock()
+
+    def _run(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix=self.name)
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _resource(self):
+        resource = getattr(self._local, "resource", None)
+        if resource is None:
+            resource = self._local.resource = self.factory()
+            with self._lock:
+                self._resources.append(resource)
+        return resource
+
+    def _discard(self):
+        resource = getattr(self._local, "resource", None)
+        self._local.resource = None
+        if resource is not None:
+            with self._lock:
+                self._resources.remove(resource)
+            self._dispose(resource)
+
+    def _dispose(self, resource):
+        pass
+
+    def close(self):
+        """Wait for running work, then dispose of every resource."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._local = threading.local()
+        with self._lock:
+            resources, self._resources = self._resources, []
+        for resource in resources:
+            self._dispose(resource)
+
+
+class ScraperPool(ThreadLocalPool):
+    """Runs cloudscraper requests on `size` threads, each with its own scraper."""
+
+    def __init__(self, size=4, factory=cloud_scraper):
+        super().__init__(size, factory, "scraper")
+
+    async def get(self, url, **kwargs):
+        """scraper.get(url, **kwargs) on a pool thread."""
+        return await self._run(self._get, url, kwargs)
+
+    def _get(self, url, kwargs):
+        return self._resource().get(url, **kwargs)
+
+
+class BrowserPool(ThreadLocalPool):
+    """Up to `size` long-lived browsers, each driven by its own thread.
+
+    `factory` returns a Selenium-style driver (get(), page_source, title,
+    quit()); tests can pass a fake one. A browser is restarted after
+    `max_pages` pages, and straight away if it raises.
+    """
+
+    def __init__(self, size=1, factory=chrome_driver, max_pages=50, page_wait=3):
+        super().__init__(size, factory, "browser")
+        self.max_pages = max_pages
+        self.page_wait = page_wait
+        self.started = 0
+        self.recycled = 0
+
+    async def load(self, url):
+        """Load a page and return (page_source, title)."""
+        return await self._run(self._load, url)
+
+    def _resource(self):
+        fresh = getattr(self._local, "resource", None) is None
+        driver = super()._resource()
+        if fresh:
+            self._local.pages = 0
+            self.started += 1
+        return driver
+
+    def _load(self, url):
+        driver = self._resource()
+        try:
+            driver.get(url)
+            time.sleep(self.page_wait)  # Wait for page load
+            page = driver.page_source, driver.title
+        except Exception:
+            self.recycled += 1
+            self._discard()
+            raise
+        self._local.pages += 1
+        if self._local.pages >= self.max_pages:
+            self.recycled += 1
+            self._discard()
+        return page
+
+    def _dispose(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
\ No newline at end of file
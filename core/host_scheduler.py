@@ -0,0 +1,214 @@
+import asyncio
+import heapq
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+
+def host_key(url):
+    """Return the scheduling key (lower-cased hostname) for a URL."""
+    try:
+        return (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        """Seconds until a token is available, 0 if one is available now."""
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class HostScheduler:
+    """Hand out queued items round-robin across hosts.
+
+    Each host gets at most `per_host_limit` items in flight and, if `rate` is
+    set, at most `rate` items per second (bursting up to `burst`). A host can
+    be paused with delay_host(), e.g. to honour Retry-After, without holding
+    up any other host, and single items can be requeued with a delay, e.g. to
+    back off before a retry. put() blocks once `max_pending` items are queued.
+    """
+
+    def __init__(self, per_host_limit, rate=None, burst=1, max_pending=1000):
+        self.per_host_limit = per_host_limit
+        self.rate = rate
+        self.burst = burst
+        self.max_pending = max_pending
+        self._queues = {}
+        self._active = {}
+        self._buckets = {}
+        self._not_before = {}
+        self._ready = deque()
+        self._timers = []
+        self._delayed = []
+        self._idle = []
+        self._sequence = 0
+        self._scheduled = set()
+        self._pending = 0
+        self._outstanding = 0
+        self._closed = False
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+
+    @property
+    def outstanding(self):
+        return self._outstanding
+
+    async def put(self, host, item):
+        """Queue an item for a host, waiting while the scheduler is full."""
+        while self._pending >= self.max_pending:
+            self._space.clear()
+            await self._space.wait()
+        self._outstanding += 1
+        self._enqueue(host, item)
+        self._wakeup.set()
+
+    def requeue(self, host, item, delay=0):
+        """Queue an already outstanding item again without blocking, after `delay` seconds."""
+        if delay > 0:
+            self._sequence += 1
+            heapq.heappush(self._delayed, (time.monotonic() + delay, self._sequence, host, item))
+        else:
+            self._enqueue(host, item)
+        self._wakeup.set()
+
+    async def get(self):
+        """Wait for the next (host, item) whose host is free, or None once drained."""
+        while True:
+            entry = self._next_ready()
+            if entry:
+                self._space.set()
+                return entry
+            if self._closed and self._outstanding == 0:
+                return None
+            due = min([heap[0][0] for heap in (self._timers, self._delayed) if heap], default=None)
+            timeout = due - time.monotonic() if due is not None else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, host):
+        """Free the slot taken by an item returned from get()."""
+        self._active[host] -= 1
+        if self._active[host] == 0:
+            del self._active[host]
+            if host not in self._queues:
+                self._forget(host)
+        if host in self._queues and host not in self._scheduled:
+            self._scheduled.add(host)
+            self._ready.append(host)
+        self._wakeup.set()
+
+    def task_done(self):
+        """Mark an item put() earlier as fully processed."""
+        self._outstanding -= 1
+        self._wakeup.set()
+
+    def delay_host(self, host, seconds):
+        """Hold back every queued item for a host for `seconds`."""
+        until = time.monotonic() + seconds
+        if until > self._not_before.get(host, 0):
+            self._not_before[host] = until
+
+    def close(self):
+        """Signal that no more items will be put."""
+        self._closed = True
+        self._wakeup.set()
+
+    def _enqueue(self, host, item):
+        queue = self._queues.get(host)
+        if queue is None:
+            queue = self._queues[host] = deque()
+        queue.append(item)
+        self._pending += 1
+        if host not in self._scheduled and self._active.get(host, 0) < self.per_host_limit:
+            self._scheduled.add(host)
+            self._ready.append(host)
+
+    def _next_ready(self):
+        now = time.monotonic()
+        while self._idle and self._idle[0][0] <= now:
+            _, host = heapq.heappop(self._idle)
+            if host not in self._queues and host not in self._active:
+                self._forget(host, now)
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, host, item = heapq.heappop(self._delayed)
+            self._enqueue(host, item)
+        while self._timers and self._timers[0][0] <= now:
+            _, host = heapq.heappop(self._timers)
+            self._ready.append(host)
+        while self._ready:
+            host = self._ready.popleft()
+            queue = self._queues.get(host)
+            active = self._active.get(host, 0)
+            if not queue or active >= self.per_host_limit:
+                self._scheduled.discard(host)
+                continue
+            due = self._not_before.get(host, 0)
+            if due <= now:
+                self._not_before.pop(host, None)
+            bucket = self._bucket(host)
+            if bucket:
+                due = max(due, now + bucket.delay(now))
+            if due > now:
+                heapq.heappush(self._timers, (due, host))
+                continue
+            item = queue.popleft()
+            self._pending -= 1
+            self._active[host] = active + 1
+            if bucket:
+                bucket.take()
+            if not queue:
+                del self._queues[host]
+                self._scheduled.discard(host)
+            elif active + 1 < self.per_host_limit:
+                self._ready.append(host)
+            else:
+                self._scheduled.discard(host)
+            return host, item
+        return None
+
+    def _bucket(self, host):
+        if not self.rate:
+            return None
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _forget(self, host, now=None):
+        """Drop per-host state once a host is idle and its bucket has refilled.
+
+        Until then the host waits in `_idle` for the time that happens, and
+        is looked at again by _next_ready().
+        """
+        now = now or time.monotonic()
+        until = self._not_before.get(host, 0)
+        bucket = self._buckets.get(host)
+        if bucket:
+            bucket.refill(now)
+            # A little slack: floating point may leave the bucket a hair short of full.
+            until = max(until, now + (bucket.burst - bucket.tokens) / bucket.rate - 1e-6)
+        if until > now:
+            heapq.heappush(self._idle, (until, host))
+            return
+        self._buckets.pop(host, None)
+        self._not_before.pop(host, None)
\ No newline at end of file
@@ -1,23 +1,157 @@
+import atexit
+import json
+import queue
+import threading
+import time
+from datetime import datetime
 from rich.console import Console
+from rich.text import Text
 from rich.theme import Theme
 
+LEVELS = {"debug": 10, "info": 20, "success": 20, "warning": 30, "error": 40}
+PREFIXES = {"debug": "[.]", "info": "[*]", "success": "[✓]", "warning": "[!]", "error": "[✗]"}
+# Lines are written in batches of up to this many.
+BATCH_SIZE = 500
+
+
 class Logger:
-    def __init__(self):
+    """Log sink for per-URL messages.
+
+    Messages below `level` are dropped. The rest are queued and rendered by
+    a background thread in batches, to the console and, if `log_file` is
+    set, to a plain-text or JSON-lines ("json") file. With `quiet` nothing
+    but report() lines reaches the console. At most `success_rate` success
+    lines per second are shown on the console (None for all); the rest are
+    counted and summed up once a second. The log file gets every message.
+    """
+
+    def __init__(self, level="info", quiet=False, success_rate=None, log_file=None, log_format="plain"):
+        if log_format not in ("plain", "json"):
+            raise ValueError(f"Unknown log format: {log_format}")
         self.console = Console(theme=Theme({
             "success": "green",
             "error": "red",
             "warning": "yellow",
-            "info": "blue"
+            "info": "blue",
+            "debug": "dim"
         }))
+        self.options = dict(level=level, quiet=quiet, success_rate=success_rate, log_file=log_file, log_format=log_format)
+        self.level = LEVELS[level]
+        self.console_level = LEVELS["error"] + 1 if quiet else self.level
+        self.success_rate = success_rate
+        self.log_file = log_file
+        self.log_format = log_format
+        self._window = 0
+        self._shown = 0
+        self._sampled_out = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
 
     def success(self, message):
-        self.console.print(f"[✓] {message}", style="success")
+        self._log("success", message)
 
     def error(self, message):
-        self.console.print(f"[✗] {message}", style="error")
+        self._log("error", message)
 
     def warning(self, message):
-        self.console.print(f"[!] {message}", style="warning")
+        self._log("warning", message)
 
     def info(self, message):
-        self.console.print(f"[*] {message}", style="info")
\ No newline at end of file
+        self._log("info", message)
+
+    def debug(self, message):
+        self._log("debug", message)
+
+    def report(self, message):
+        """Log an info line that is shown even in quiet mode, e.g. the summary."""
+        self._flush_sampled()
+        self._emit("info", message, True)
+
+    def _log(self, level, message):
+        if LEVELS[level] < self.level:
+            return
+        console = LEVELS[level] >= self.console_level
+        if console and level == "success" and self.success_rate is not None:
+            console = self._sample()
+        if console or self.log_file:
+            self._emit(level, message, console)
+
+    def _sample(self):
+        now = int(time.monotonic())
+        if now != self._window:
+            self._flush_sampled()
+            self._window, self._shown = now, 0
+        if self._shown < self.success_rate:
+            self._shown += 1
+            return True
+        self._sampled_out += 1
+        return False
+
+    def _flush_sampled(self):
+        if self._sampled_out:
+            self._emit("success", f"... and {self._sampled_out} more OK", True, to_file=False)
+            self._sampled_out = 0
+
+    def _emit(self, level, message, console, to_file=True):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="logger", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+        self._queue.put((time.time(), level, message, console, to_file))
+
+    def flush(self):
+        """Wait until everything logged so far has been written."""
+        if self._thread is not None and self._thread.is_alive():
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+
+    def close(self):
+        """Write everything still queued and stop the background thread."""
+        self._flush_sampled()
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        log_file = open(self.log_file, 'a', encoding='utf-8') if self.log_file else None
+        try:
+            running = True
+            while running:
+                batch = [self._queue.get()]
+                while len(batch) < BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                records = []
+                for entry in batch:
+                    if entry is None:
+                        running = False
+                    elif isinstance(entry, threading.Event):
+                        self._write(records, log_file)
+                        records = []
+                        entry.set()
+                    else:
+                        records.append(entry)
+                self._write(records, log_file)
+        finally:
+            if log_file:
+                log_file.close()
+
+    def _write(self, records, log_file):
+        lines = [Text(f"{PREFIXES[level]} {message}", style=level) for _, level, message, console, _ in records if console]
+        if lines:
+            self.console.print(Text("\n").join(lines))
+        if log_file:
+            log_file.writelines(self._format(record) for record in records if record[4])
+            log_file.flush()
+
+    def _format(self, record):
+        at, level, message, _, _ = record
+        if self.log_format == "json":
+            return json.dumps({"time": at, "level": level, "message": message}, ensure_ascii=False) + "\n"
+        return f"{datetime.fromtimestamp(at).isoformat(timespec='milliseconds')} {level.upper()} {message}\n"
\ No newline at end of file
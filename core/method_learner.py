@@ -0,0 +1,56 @@
+# HEAD answers that mean "try GET instead" rather than "the page is broken".
+HEAD_REJECTED = (400, 403, 405, 501)
+# Sent with GET probes: the server only has to send one byte, and we read none.
+PROBE_HEADERS = {"Range": "bytes=0-0"}
+
+
+class MethodLearner:
+    """Learns per host whether HEAD requests are honoured.
+
+    A host that answers HEAD with one of HEAD_REJECTED while GET works
+    `threshold` times in a row is switched to GET-only for the rest of the
+    run, so its later URLs cost one request instead of two. A HEAD that is
+    answered normally resets the count. At most `max_hosts` hosts are
+    remembered; the oldest are forgotten first.
+    """
+
+    def __init__(self, threshold=2, max_hosts=100000):
+        self.threshold = threshold
+        self.max_hosts = max_hosts
+        self._rejections = {}
+        self._get_only = {}
+        self.switched = 0
+        self.heads_skipped = 0
+
+    def get_only(self, host):
+        """True if the host's URLs should be checked with GET straight away."""
+        if host in self._get_only:
+            self.heads_skipped += 1
+            return True
+        return False
+
+    def head_rejected(self, host):
+        """HEAD was rejected but GET worked for one of the host's URLs."""
+        if host in self._get_only:
+            # A HEAD sent before the switch, answered after it.
+            return
+        rejections = self._rejections.get(host, 0) + 1
+        if rejections < self.threshold:
+            self._remember(self._rejections, host, rejections)
+            return
+        self._rejections.pop(host, None)
+        self._remember(self._get_only, host, True)
+        self.switched += 1
+
+    def head_honoured(self, host):
+        self._rejections.pop(host, None)
+
+    def _remember(self, hosts, host, value):
+        if host not in hosts and len(hosts) >= self.max_hosts:
+            # Dicts keep insertion order: drop the older half.
+            for old in list(hosts)[:self.max_hosts // 2]:
+                del hosts[old]
+        hosts[host] = value
+
+    def stats(self):
+        return {"switched": self.switched, "heads_skipped": self.heads_skipped}
\ No newline at end of file
@@ -0,0 +1,274 @@
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+import aiohttp
+
+# Upper bounds (seconds) of the latency histogram buckets; the last one is +Inf.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf"))
+PHASES = ("queued", "dns", "connect", "ttfb", "request")
+FILE_NAME = "metrics.json"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram: observe() is a bisect and an increment."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def to_dict(self):
+        return {"counts": list(self.counts), "sum": round(self.sum, 6), "count": self.count}
+
+
+def quantile(histogram, q):
+    """Estimate a quantile from a histogram dict, interpolating inside the bucket."""
+    if not histogram["count"]:
+        return None
+    rank = q * histogram["count"]
+    seen = 0
+    for i, count in enumerate(histogram["counts"]):
+        if count and seen + count >= rank:
+            lower = BUCKETS[i - 1] if i else 0
+            upper = BUCKETS[i] if BUCKETS[i] != float("inf") else lower * 2 or 1
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+    return BUCKETS[-2]
+
+
+class Metrics:
+    """Request metrics collected through an aiohttp TraceConfig.
+
+    Per-phase latency histograms (waiting for a connection slot, DNS, TCP and
+    TLS connect, time to first byte after the request was sent, and the
+    whole request), new vs reused connections, bytes read, errors by type,
+    results per check method (HEAD, GET, fallbacks, cache...) and per-host
+    latency for the slowest-hosts list.
+    """
+
+    def __init__(self, slowest=10, max_hosts=50000):
+        self.slowest = slowest
+        self.max_hosts = max_hosts
+        self.phases = {phase: Histogram() for phase in PHASES}
+        self.created = 0
+        self.reused = 0
+        self.bytes_read = 0
+        self.errors = {}
+        self.methods = {}
+        self._hosts = {}
+
+    def trace_config(self):
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_request_headers_sent.append(self._on_headers_sent)
+        trace.on_connection_queued_start.append(self._on_queued_start)
+        trace.on_connection_queued_end.append(self._on_queued_end)
+        trace.on_dns_resolvehost_start.append(self._on_dns_start)
+        trace.on_dns_resolvehost_end.append(self._on_dns_end)
+        trace.on_connection_create_start.append(self._on_connect_start)
+        trace.on_connection_create_end.append(self._on_connect_end)
+        trace.on_connection_reuseconn.append(self._on_reuse)
+        trace.on_response_chunk_received.append(self._on_chunk)
+        trace.on_request_end.append(self._on_request_end)
+        trace.on_request_exception.append(self._on_request_exception)
+        return trace
+
+    def method(self, name):
+        """Count a result produced by a check method, e.g. "HEAD" or "selenium"."""
+        self.methods[name] = self.methods.get(name, 0) + 1
+
+    async def _on_request_start(self, session, ctx, params):
+        ctx.start = ctx.sent = time.monotonic()
+        ctx.host = params.url.host
+        ctx.dns = 0.0
+
+    async def _on_headers_sent(self, session, ctx, params):
+        ctx.sent = time.monotonic()
+
+    async def _on_queued_start(self, session, ctx, params):
+        ctx.queued = time.monotonic()
+
+    async def _on_queued_end(self, session, ctx, params):
+        self.phases["queued"].observe(time.monotonic() - ctx.queued)
+
+    async def _on_dns_start(self, session, ctx, params):
+        ctx.dns_start = time.monotonic()
+
+    async def _on_dns_end(self, session, ctx, params):
+        elapsed = time.monotonic() - ctx.dns_start
+        ctx.dns += elapsed
+        self.phases["dns"].observe(elapsed)
+
+    async def _on_connect_start(self, session, ctx, params):
+        ctx.connect_start = time.monotonic()
+        ctx.dns_before_connect = ctx.dns
+
+    async def _on_connect_end(self, session, ctx, params):
+        # Connection setup includes the DNS lookup; count that under "dns" only.
+        elapsed = time.monotonic() - ctx.connect_start - (ctx.dns - ctx.dns_before_connect)
+        self.phases["connect"].observe(max(elapsed, 0))
+        self.created += 1
+
+    async def _on_reuse(self, session, ctx, params):
+        self.reused += 1
+
+    async def _on_chunk(self, session, ctx, params):
+        self.bytes_read += len(params.chunk)
+
+    async def _on_request_end(self, session, ctx, params):
+        now = time.monotonic()
+        self.phases["ttfb"].observe(now - ctx.sent)
+        self._finish(ctx, now)
+
+    async def _on_request_exception(self, session, ctx, params):
+        name = type(params.exception).__name__
+        self.errors[name] = self.errors.get(name, 0) + 1
+        self._finish(ctx, time.monotonic())
+
+    def _finish(self, ctx, now):
+        elapsed = now - ctx.start
+        self.phases["request"].observe(elapsed)
+        host = self._hosts.get(ctx.host)
+        if host is None:
+            if len(self._hosts) >= self.max_hosts:
+                self._prune()
+            host = self._hosts[ctx.host] = [0, 0.0, 0.0]
+        host[0] += 1
+        host[1] += elapsed
+        host[2] = max(host[2], elapsed)
+
+    def _prune(self):
+        # Keep the slower half of the hosts seen so far.
+        ranked = sorted(self._hosts.items(), key=lambda item: item[1][1] / item[1][0], reverse=True)
+        self._hosts = dict(ranked[:self.max_hosts // 2])
+
+    def snapshot(self):
+        """All metrics as plain data, as written to metrics.json."""
+        hosts = sorted(self._hosts.items(), key=lambda item: item[1][1] / item[1][0], reverse=True)
+        return {
+            "phases": {phase: histogram.to_dict() for phase, histogram in self.phases.items()},
+            "connections": {"created": self.created, "reused": self.reused},
+            "bytes_read": self.bytes_read,
+            "errors": dict(self.errors),
+            "methods": dict(self.methods),
+            "slowest_hosts": [
+                {"host": host, "requests": count, "mean": round(total / count, 4), "max": round(worst, 4)}
+                for host, (count, total, worst) in hosts[:self.slowest]
+            ]
+        }
+
+
+def merge_snapshots(snapshots, slowest=10):
+    """Combine Metrics.snapshot() from several processes into one."""
+    merged = Metrics().snapshot()
+    for snapshot in snapshots:
+        for phase, histogram in snapshot["phases"].items():
+            total = merged["phases"][phase]
+            total["counts"] = [a + b for a, b in zip(total["counts"], histogram["counts"])]
+            total["sum"] = round(total["sum"] + histogram["sum"], 6)
+            total["count"] += histogram["count"]
+        for key in ("created", "reused"):
+            merged["connections"][key] += snapshot["connections"][key]
+        merged["bytes_read"] += snapshot["bytes_read"]
+        for field in ("errors", "methods"):
+            for name, count in snapshot[field].items():
+                merged[field][name] = merged[field].get(name, 0) + count
+        merged["slowest_hosts"] += snapshot["slowest_hosts"]
+    merged["slowest_hosts"] = sorted(merged["slowest_hosts"], key=lambda host: host["mean"], reverse=True)[:slowest]
+    return merged
+
+
+def summary(snapshot):
+    """Format a snapshot as summary lines."""
+    phases = ", ".join(
+        f"{phase} {_ms(quantile(histogram, 0.5))}/{_ms(quantile(histogram, 0.99))}"
+        for phase, histogram in snapshot["phases"].items() if histogram["count"]
+    )
+    connections = snapshot["connections"]
+    opened = connections["created"] + connections["reused"]
+    reuse = connections["reused"] / opened if opened else 0
+    lines = [f"Latency p50/p99: {phases or 'no requests'}",
+             f"Connections: {connections['created']} opened, {reuse:.0%} of requests reused one, "
+             f"{snapshot['bytes_read'] / 1e6:.1f} MB read"]
+    if snapshot["methods"]:
+        lines.append("Results by method: " + ", ".join(f"{name} {count}" for name, count in
+                                                        sorted(snapshot["methods"].items(), key=lambda item: -item[1])))
+    if snapshot["slowest_hosts"]:
+        lines.append("Slowest hosts: " + ", ".join(f"{host['host']} ({host['mean'] * 1000:.0f} ms avg)"
+                                                    for host in snapshot["slowest_hosts"][:5]))
+    return lines
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.0f}ms" if seconds is not None else "-"
+
+
+def prometheus_text(snapshot):
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines = []
+    lines.append("# TYPE linkcheck_phase_seconds histogram")
+    for phase, histogram in snapshot["phases"].items():
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram["counts"]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'linkcheck_phase_seconds_bucket{{phase="{phase}",le="{le}"}} {cumulative}')
+        lines.append(f'linkcheck_phase_seconds_sum{{phase="{phase}"}} {histogram["sum"]}')
+        lines.append(f'linkcheck_phase_seconds_count{{phase="{phase}"}} {histogram["count"]}')
+    lines.append("# TYPE linkcheck_connections_total counter")
+    for kind, count in snapshot["connections"].items():
+        lines.append(f'linkcheck_connections_total{{kind="{kind}"}} {count}')
+    lines.append("# TYPE linkcheck_bytes_read_total counter")
+    lines.append(f"linkcheck_bytes_read_total {snapshot['bytes_read']}")
+    lines.append("# TYPE linkcheck_errors_total counter")
+    for name, count in snapshot["errors"].items():
+        lines.append(f'linkcheck_errors_total{{type="{name}"}} {count}')
+    lines.append("# TYPE linkcheck_results_total counter")
+    for name, count in snapshot["methods"].items():
+        lines.append(f'linkcheck_results_total{{method="{_escape(name)}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def write_snapshot(output_dir, snapshot):
+    """Atomically write a snapshot to metrics.json in the output directory."""
+    path = Path(output_dir) / FILE_NAME
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({**snapshot, "updated_at": time.time()}, f, indent=2)
+    os.replace(tmp, path)
+
+
+async def export(output_dir, snapshot, interval=5):
+    """Write snapshot() to metrics.json every `interval` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(write_snapshot, output_dir, snapshot())
+
+
+async def serve(snapshot, host="127.0.0.1", port=9464):
+    """Serve snapshot() as Prometheus text on /metrics; returns the runner to clean up."""
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=prometheus_text(snapshot()), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
\ No newline at end of file
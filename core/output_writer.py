@@ -1,27 +1,171 @@
-import aiofiles
 import asyncio
+import csv
+import json
 from pathlib import Path
+from .records import CheckResult, RESULT_FIELDS
+
+STRUCTURED_FILES = {"jsonl": "results.jsonl", "csv": "results.csv"}
+
 
 class OutputWriter:
-    def __init__(self, output_dir):
+    """Buffered writer for working.txt, notworking.txt and an optional structured stream.
+
+    Results are buffered in memory and written by a single background task
+    every `flush_interval` seconds, or sooner once `buffer_size` results are
+    waiting. File handles stay open for the whole run and each flush is one
+    thread hop. Everything buffered is flushed on __aexit__.
+    """
+
+    def __init__(self, output_dir, structured_format=None, buffer_size=1000, flush_interval=1.0):
+        if structured_format and structured_format not in STRUCTURED_FILES:
+            raise ValueError(f"Unknown structured output format: {structured_format}")
         self.working_file = Path(output_dir) / "working.txt"
         self.notworking_file = Path(output_dir) / "notworking.txt"
+        self.structured_format = structured_format
+        self.structured_file = Path(output_dir) / STRUCTURED_FILES[structured_format] if structured_format else None
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
         self.lock = asyncio.Lock()
+        self._buffer = []
+        self._handles = None
+        self._csv = None
+        self._flush_needed = asyncio.Event()
+        self._flusher = None
+        self.written = {True: 0, False: 0}
 
     async def __aenter__(self):
+        self._handles = await asyncio.to_thread(self._open)
+        self._flusher = asyncio.create_task(self._flush_periodically())
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
-        pass
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        if self._handles:
+            await asyncio.to_thread(self._close)
+            self._handles = None
 
     async def write_working(self, url):
-        """Write to working.txt thread-safely."""
-        async with self.lock:
-            async with aiofiles.open(self.working_file, 'a', encoding='utf-8') as f:
-                await f.write(f"{url}\n")
+        """Buffer a URL for working.txt."""
+        await self.write_result(CheckResult(url, True))
 
     async def write_not_working(self, url):
-        """Write to notworking.txt thread-safely."""
+        """Buffer a URL for notworking.txt."""
+        await self.write_result(CheckResult(url, False))
+
+    async def write_result(self, result):
+        """Buffer a CheckResult; waits for a flush first if the buffer is far behind.
+
+        Nothing is awaited once the result is in the buffer, so a caller can
+        mark it done as soon as this returns without a sync() landing in
+        between and saving the result but not its being done.
+        """
+        if self._flusher is None:
+            # Not entered as a context manager: write through, outside the buffer sync() cuts.
+            async with self.lock:
+                await asyncio.to_thread(self._write_through, [result])
+            self.written[result.ok] += 1
+            return
+        if len(self._buffer) >= self.buffer_size * 4:
+            await self.flush()
+        self._buffer.append(result)
+        self.written[result.ok] += 1
+        if len(self._buffer) >= self.buffer_size:
+            self._flush_needed.set()
+
+    async def flush(self):
+        """Write everything buffered so far to disk."""
+        async with self.lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            if self._handles is None:
+                # Not entered as a context manager: write through.
+                await asyncio.to_thread(self._write_through, batch)
+            else:
+                await asyncio.to_thread(self._write, self._handles, batch)
+
+    async def sync(self, snapshot):
+        """Flush to disk, calling snapshot() at the exact moment the buffer is cut.
+
+        Returns (snapshot(), {file name: size in bytes}). Every result written
+        before the snapshot is on disk and counted in the sizes; nothing
+        written after it is.
+        """
         async with self.lock:
-            async with aiofiles.open(self.notworking_file, 'a', encoding='utf-8') as f:
-                await f.write(f"{url}\n")
\ No newline at end of file
+            state = snapshot()
+            batch, self._buffer = self._buffer, []
+            if self._handles is None:
+                await asyncio.to_thread(self._write_through, batch)
+                return state, await asyncio.to_thread(self._sizes, None)
+            return state, await asyncio.to_thread(self._write_and_measure, batch)
+
+    def truncate(self, sizes):
+        """Cut the output files back to sizes recorded by sync(), e.g. when resuming."""
+        for path in self._paths():
+            size = sizes.get(path.name, 0)
+            if path.exists() and path.stat().st_size > size:
+                with open(path, 'r+b') as f:
+                    f.truncate(size)
+
+    async def _flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_needed.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_needed.clear()
+            await self.flush()
+
+    def _open(self):
+        handles = {
+            True: open(self.working_file, 'a', encoding='utf-8'),
+            False: open(self.notworking_file, 'a', encoding='utf-8')
+        }
+        if self.structured_file:
+            handles["structured"] = open(self.structured_file, 'a', encoding='utf-8', newline='')
+            if self.structured_format == "csv":
+                self._csv = csv.DictWriter(handles["structured"], fieldnames=RESULT_FIELDS)
+                if handles["structured"].tell() == 0:
+                    self._csv.writeheader()
+        return handles
+
+    def _write_through(self, batch):
+        handles = self._open()
+        try:
+            self._write(handles, batch)
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+    def _write(self, handles, batch):
+        handles[True].writelines(f"{r.url}\n" for r in batch if r.ok)
+        handles[False].writelines(f"{r.url}\n" for r in batch if not r.ok)
+        if self.structured_format == "jsonl":
+            handles["structured"].writelines(json.dumps(r.to_dict(), ensure_ascii=False) + "\n" for r in batch)
+        elif self.structured_format == "csv":
+            self._csv.writerows(r.to_dict() for r in batch)
+        for handle in handles.values():
+            handle.flush()
+
+    def _write_and_measure(self, batch):
+        self._write(self._handles, batch)
+        return self._sizes(self._handles)
+
+    def _paths(self):
+        return [p for p in (self.working_file, self.notworking_file, self.structured_file) if p]
+
+    def _sizes(self, handles):
+        if handles:
+            return {Path(h.name).name: h.tell() for h in handles.values()}
+        return {p.name: p.stat().st_size if p.exists() else 0 for p in self._paths()}
+
+    def _close(self):
+        for handle in self._handles.values():
+            handle.close()
\ No newline at end of file
@@ -0,0 +1,36 @@
+from dataclasses import dataclass, asdict, fields
+
+
+@dataclass
+class CheckResult:
+    """Final outcome of checking one URL."""
+    url: str
+    ok: bool
+    status: int = None
+    category: str = None
+    method: str = None
+    redirect: str = None
+    latency: float = None
+    reason: str = None
+    etag: str = None
+    last_modified: str = None
+
+    def to_dict(self):
+        return asdict(self)
+
+
+RESULT_FIELDS = [f.name for f in fields(CheckResult)]
+
+
+@dataclass
+class Job:
+    """A URL waiting in the scheduler, with any conditional request headers.
+
+    `offset` is the byte offset of the URL's line in the input, if known.
+    `started` is the time.monotonic() its first attempt began at.
+    """
+    url: str
+    attempt: int = 0
+    headers: dict = None
+    offset: int = None
+    started: float = None
\ No newline at end of file
@@ -10,4 +10,11 @@ class ResultFolder:
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         output_dir = self.base_path / f"output_{timestamp}"
         output_dir.mkdir(parents=True, exist_ok=True)
+        return output_dir
+
+    def resume(self, output_dir):
+        """Return an existing output folder to continue writing into."""
+        output_dir = Path(output_dir)
+        if not output_dir.is_dir():
+            raise FileNotFoundError(f"Output folder {output_dir} does not exist")
         return output_dir
\ No newline at end of file
@@ -0,0 +1,191 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    url TEXT PRIMARY KEY,
+    ok INTEGER NOT NULL,
+    status INTEGER,
+    category TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    checked_at REAL NOT NULL
+)
+"""
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER on older builds.
+LOOKUP_CHUNK = 500
+
+
+def is_definitive(ok, status, category):
+    """True for an outcome that says something about the link itself.
+
+    A working link or a bad status is; 429 and 5xx answers are the server
+    being busy or broken for now, like timeouts and connection errors.
+    """
+    if ok:
+        return True
+    return category == "status" and status != 429 and not 500 <= (status or 0) < 600
+
+
+class StoredResult:
+    __slots__ = ("ok", "status", "category", "etag", "last_modified", "checked_at")
+
+    def __init__(self, ok, status, category, etag, last_modified, checked_at):
+        self.ok = bool(ok)
+        self.status = status
+        self.category = category
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = checked_at
+
+    def is_fresh(self, ttl, now=None):
+        return ((now or time.time()) - self.checked_at) < ttl
+
+    @property
+    def definitive(self):
+        return is_definitive(self.ok, self.status, self.category)
+
+    def validators(self):
+        """Conditional request headers for revalidating this result, or None."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers or None
+
+
+class ResultStore:
+    """On-disk cache of results across runs, keyed by normalized URL.
+
+    Backed by SQLite in WAL mode. All database work runs on one dedicated
+    thread, lookups take a whole batch of URLs at a time and writes are
+    buffered and committed in batches of `batch_size`, or every
+    `flush_interval` seconds while the store is open, so the event loop
+    never waits on disk for a single URL and a slow trickle of results (as
+    in --serve) is still saved soon after it arrives.
+
+    Only definitive results (the link works, or the server answered with a
+    bad status other than 429 or 5xx) are kept for `ttl` seconds. Those and
+    timeouts, connection and DNS errors may be the network's or the
+    server's passing fault rather than the link's, so they are
+    kept for `failure_ttl` seconds, or not at all when that is 0. Results
+    from an open circuit breaker are never kept.
+    """
+
+    def __init__(self, path, ttl=86400, batch_size=500, failure_ttl=0, flush_interval=5.0):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-store")
+        self._db = None
+        self._pending = []
+        self._flushes = set()
+        self._flusher = None
+        self.hits = 0
+        self.misses = 0
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        await self._run(self._open)
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def lookup(self, urls):
+        """Return {url: StoredResult} for the URLs that have a stored result."""
+        found = await self._run(self._lookup, list(urls))
+        self.hits += len(found)
+        self.misses += len(urls) - len(found)
+        return found
+
+    def is_fresh(self, entry, now=None):
+        """True if a stored result is recent enough to be reused instead of a check."""
+        if entry.category == "circuit":
+            return False
+        return entry.is_fresh(self.ttl if entry.definitive else self.failure_ttl, now)
+
+    def add(self, result):
+        """Queue a CheckResult for saving; written in batches."""
+        if result.category == "circuit":
+            return
+        if not (is_definitive(result.ok, result.status, result.category) or self.failure_ttl):
+            return
+        self._pending.append((
+            result.url, int(result.ok), result.status, result.category,
+            result.etag, result.last_modified, time.time()
+        ))
+        if len(self._pending) >= self.batch_size:
+            task = asyncio.ensure_future(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def flush(self):
+        """Commit everything queued so far."""
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        await self._run(self._save, rows)
+
+    async def close(self):
+        if self._flusher:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes)
+        await self.flush()
+        if self._db is not None:
+            await self._run(self._db.close)
+            self._db = None
+        self._executor.shutdown(wait=True)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _run(self, func, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def _lookup(self, urls):
+        found = {}
+        for i in range(0, len(urls), LOOKUP_CHUNK):
+            chunk = urls[i:i + LOOKUP_CHUNK]
+            rows = self._db.execute(
+                "SELECT url, ok, status, category, etag, last_modified, checked_at FROM results "
+                f"WHERE url IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for url, *fields in rows:
+                found[url] = StoredResult(*fields)
+        return found
+
+    def _save(self, rows):
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO results (url, ok, status, category, etag, last_modified, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
\ No newline at end of file
@@ -0,0 +1,53 @@
+import random
+from dataclasses import dataclass
+
+# Base backoff in seconds per failure category; doubled on every further attempt.
+DEFAULT_BACKOFF = {"timeout": 2, "connection": 1, "ssl": 1, "status": 2, "client": 2}
+
+
+@dataclass
+class Retry:
+    """Returned by URLVerifier.check_url when a URL should be queued again.
+
+    `attempt` is the attempt number to resume from and `delay` how many
+    seconds to wait before the job may be handed out again.
+    """
+    attempt: int
+    delay: float = 0
+
+
+class RetryPolicy:
+    """Backoff delays and a per-run retry budget.
+
+    The delay for a failure category grows as base * 2**attempt, capped at
+    `max_delay`, with jitter so retries of URLs that failed together do not
+    come back together. The budget allows `budget_min` retries plus
+    `budget_ratio` retries per URL checked; once it is used up, failures are
+    final straight away, so a bad network minute can't multiply the work.
+    """
+
+    def __init__(self, backoff=None, max_delay=60, budget_ratio=0.2, budget_min=100):
+        self.backoff = {**DEFAULT_BACKOFF, **(backoff or {})}
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_min = budget_min
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+
+    def request(self):
+        """Count a URL's first attempt towards the budget."""
+        self.requests += 1
+
+    def allow(self):
+        """Take one retry from the budget; False if it is used up."""
+        if self.budget_ratio is not None and self.retries >= self.budget_min + self.budget_ratio * self.requests:
+            self.denied += 1
+            return False
+        self.retries += 1
+        return True
+
+    def delay(self, category, attempt):
+        """Seconds to wait before retrying after `attempt` failed with `category`."""
+        delay = min(self.max_delay, self.backoff.get(category, 1) * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
\ No newline at end of file
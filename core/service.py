@@ -0,0 +1,281 @@
+import asyncio
+import itertools
+import json
+import os
+import stat
+import time
+from collections import deque
+from aiohttp import web
+from .metrics import prometheus_text
+
+
+class Batch:
+    """A submitted list of URLs and the results checked for it so far."""
+
+    def __init__(self, batch_id, urls):
+        self.id = batch_id
+        self.pending = deque(urls)
+        self.submitted = len(urls)
+        self.fed = 0
+        self.results = []
+        self.ok = 0
+        self.state = "queued"
+        self.created_at = time.time()
+        self.finished_at = None
+        self.changed = asyncio.Event()
+        if not urls:
+            self._check_finished()
+
+    @property
+    def finished(self):
+        return self.state in ("done", "cancelled")
+
+    def add(self, result):
+        self.results.append(result)
+        self.ok += result.ok
+        self._check_finished()
+        self._notify()
+
+    def cancel(self):
+        if not self.finished:
+            self.pending.clear()
+            self._check_finished(cancelled=True)
+            self._notify()
+
+    def _check_finished(self, cancelled=False):
+        if self.pending or len(self.results) < self.fed:
+            if cancelled:
+                self.state = "cancelling"
+            return
+        self.state = "cancelled" if cancelled or self.state == "cancelling" else "done"
+        self.finished_at = time.time()
+
+    def _notify(self):
+        # Set once on the next change; waiters take the current event before looking at the results.
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def status(self):
+        return {
+            "id": self.id,
+            "state": self.state,
+            "submitted": self.submitted,
+            "done": len(self.results),
+            "ok": self.ok,
+            "failed": len(self.results) - self.ok,
+            "queued": len(self.pending),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+class VerifierService:
+    """Keeps one URLVerifier running and checks submitted batches of URLs with it.
+
+    All batches go through a single process_stream() call, so they share the
+    verifier's connection pools, DNS cache, circuit breaker, HEAD/GET
+    learning and per-host limits. URLs are fed round-robin, one from each
+    unfinished batch in turn, so a big batch can't hold up a small one
+    submitted after it for longer than the verifier's queue takes to drain.
+    Finished batches are forgotten after `keep_finished` seconds.
+    """
+
+    def __init__(self, verifier, keep_finished=3600):
+        self.verifier = verifier
+        self.keep_finished = keep_finished
+        self.batches = {}
+        self._active = deque()
+        self._wakeup = asyncio.Event()
+        self._owners = {}
+        self._results = {}
+        self._ids = itertools.count(1)
+        self._closing = False
+        self._task = None
+
+    async def __aenter__(self):
+        await self.verifier.__aenter__()
+        self._task = asyncio.create_task(self.verifier.process_stream(self._jobs(), self, on_done=self._done))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Stop taking URLs, let the ones in flight finish, then close the verifier."""
+        self._closing = True
+        self._wakeup.set()
+        for batch in self.batches.values():
+            batch.cancel()
+        try:
+            await self._task
+        finally:
+            await self.verifier.__aexit__(exc_type, exc, tb)
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def submit(self, urls):
+        """Queue a batch of URLs and return its Batch.
+
+        Lines that aren't valid URLs are kept as they are; the verifier writes
+        them out as invalid.
+        """
+        self._forget_finished()
+        urls = [url for url in (self._normalized(url.strip()) for url in urls) if url]
+        batch = Batch(str(next(self._ids)), urls)
+        self.batches[batch.id] = batch
+        if urls:
+            self._active.append(batch)
+            self._wakeup.set()
+        return batch
+
+    def _normalized(self, url):
+        try:
+            return self.verifier.normalize_url(url)
+        except ValueError:
+            return url
+
+    def _forget_finished(self):
+        cutoff = time.time() - self.keep_finished
+        for batch_id in [b.id for b in self.batches.values() if b.finished and b.finished_at < cutoff]:
+            del self.batches[batch_id]
+
+    async def _jobs(self):
+        while not self._closing:
+            if not self._active:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            batch = self._active.popleft()
+            if not batch.pending:
+                continue
+            url = batch.pending.popleft()
+            self._owners.setdefault(url, deque()).append(batch)
+            batch.fed += 1
+            batch.state = "running"
+            if batch.pending:
+                self._active.append(batch)
+            yield url
+
+    async def write_result(self, result):
+        """The verifier's output writer: hold the result until on_done says whose it is."""
+        self._results.setdefault(result.url, deque()).append(result)
+
+    def _done(self, job):
+        # Jobs are matched to batches by URL: the verifier makes the Jobs, and one
+        # waiting for the fallbacks may come back as a copy.
+        owners = self._owners.get(job.url)
+        batch = owners.popleft() if owners else None
+        if owners is not None and not owners:
+            del self._owners[job.url]
+        results = self._results.get(job.url)
+        if not results:
+            return
+        result = results.popleft()
+        if not results:
+            del self._results[job.url]
+        if batch:
+            batch.add(result)
+
+    def status(self):
+        states = {}
+        for batch in self.batches.values():
+            states[batch.state] = states.get(batch.state, 0) + 1
+        return {"running": self.running, "batches": states, "verifier": self.verifier.stats()}
+
+
+def make_app(service):
+    """aiohttp app exposing a VerifierService.
+
+    POST /jobs               submit URLs (one per line, or JSON {"urls": [...]})
+    GET  /jobs               status of every known batch
+    GET  /jobs/{id}          status of one batch
+    GET  /jobs/{id}/results  results as JSON lines, streamed until the batch finishes
+    DELETE /jobs/{id}        stop feeding the batch's remaining URLs
+    GET  /status             service counters; GET /metrics for Prometheus
+    """
+    routes = web.RouteTableDef()
+
+    def get_batch(request):
+        batch = service.batches.get(request.match_info["id"])
+        if batch is None:
+            raise web.HTTPNotFound(text="No such job")
+        return batch
+
+    @routes.post("/jobs")
+    async def submit(request):
+        if not service.running:
+            raise web.HTTPServiceUnavailable(text="The verifier has stopped")
+        if request.content_type == "application/json":
+            try:
+                body = await request.json()
+            except ValueError:
+                body = None
+            urls = body.get("urls") if isinstance(body, dict) else None
+            if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+                raise web.HTTPBadRequest(text='Expected {"urls": [...]}')
+        else:
+            urls = [line.decode('utf-8', errors='replace') async for line in request.content]
+        batch = service.submit(urls)
+        return web.json_response(batch.status(), status=201)
+
+    @routes.get("/jobs")
+    async def list_batches(request):
+        return web.json_response([batch.status() for batch in service.batches.values()])
+
+    @routes.get("/jobs/{id}")
+    async def batch_status(request):
+        return web.json_response(get_batch(request).status())
+
+    @routes.delete("/jobs/{id}")
+    async def cancel(request):
+        batch = get_batch(request)
+        batch.cancel()
+        return web.json_response(batch.status())
+
+    @routes.get("/jobs/{id}/results")
+    async def results(request):
+        batch = get_batch(request)
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        sent = 0
+        while True:
+            changed = batch.changed
+            finished = batch.finished
+            if sent < len(batch.results):
+                lines = [json.dumps(result.to_dict(), ensure_ascii=False) + "\n" for result in batch.results[sent:]]
+                sent += len(lines)
+                await response.write("".join(lines).encode('utf-8'))
+            if finished:
+                break
+            await changed.wait()
+        await response.write_eof()
+        return response
+
+    @routes.get("/status")
+    async def status(request):
+        return web.json_response(service.status())
+
+    @routes.get("/metrics")
+    async def metrics(request):
+        if not service.verifier.metrics:
+            raise web.HTTPNotFound(text="Metrics are turned off")
+        return web.Response(text=prometheus_text(service.verifier.metrics.snapshot()), content_type="text/plain",
+                            charset="utf-8")
+
+    app = web.Application(client_max_size=64 * 1024 ** 2)
+    app.add_routes(routes)
+    return app
+
+
+async def serve(service, address):
+    """Serve the API on "HOST:PORT", "PORT" or a Unix socket path; returns the runner to clean up."""
+    runner = web.AppRunner(make_app(service), access_log=None)
+    await runner.setup()
+    if "/" in address:
+        if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+            os.unlink(address)  # left behind by a previous run
+        site = web.UnixSite(runner, address)
+    else:
+        host, _, port = address.rpartition(":")
+        site = web.TCPSite(runner, host or "127.0.0.1", int(port))
+    await site.start()
+    return runner
\ No newline at end of file
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+import time
+import zlib
+from .batching import ready_batches
+from .host_scheduler import host_key
+from .logger import Logger
+from .metrics import merge_snapshots
+from .verifier import URLVerifier, merge_stats
+
+# Jobs are sent to worker processes, and events back, in batches of this many.
+BATCH_SIZE = 200
+# Seconds a partly filled batch may wait before it is sent anyway.
+BATCH_DELAY = 0.1
+# Seconds between liveness checks while blocked on a queue.
+POLL_INTERVAL = 0.5
+# Seconds between metrics snapshots sent by each worker process.
+METRICS_INTERVAL = 1.0
+
+
+def shard_for(url, workers):
+    """Index of the worker process that checks a URL; all URLs of a host go to the same one."""
+    return zlib.crc32(host_key(url).encode("utf-8", "surrogatepass")) % workers
+
+
+class ShardedRunner:
+    """Runs the checks in `workers` processes, each with its own event loop and session.
+
+    The parent process reads the input and runs the ingest stages (dedup,
+    stored results) of `verifier`, then sends each job to the process that
+    owns its host, so connection reuse and per-host limits keep working.
+    Worker processes send their results back; the parent writes them to the
+    one output directory, saves them to the result store and merges every
+    process's counters into a single summary and their metrics into one
+    snapshot.
+    """
+
+    def __init__(self, config, workers, verifier, debug=False):
+        self.config = config
+        self.workers = workers
+        self.verifier = verifier
+        self.logger = verifier.logger
+        self.debug = debug
+        self._processes = []
+        self._inboxes = []
+        self._outbox = None
+        self._metrics = {}
+
+    def metrics_snapshot(self):
+        """Metrics of the parent and the latest snapshot from every worker process, merged."""
+        if not self.verifier.metrics:
+            return None
+        return merge_snapshots([self.verifier.metrics.snapshot()] + list(self._metrics.values()))
+
+    async def process_stream(self, urls, output_writer, on_done=None):
+        """Same contract as URLVerifier.process_stream, spread over the worker processes."""
+        context = multiprocessing.get_context("spawn")
+        self._outbox = context.Queue()
+        for index in range(self.workers):
+            inbox = context.Queue(maxsize=max(2, self.verifier.queue_size // BATCH_SIZE // self.workers))
+            process = context.Process(
+                target=shard_main,
+                args=(index, self.config, self.debug, self.logger.options, inbox, self._outbox),
+                name=f"verifier-{index}",
+                daemon=True
+            )
+            process.start()
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+
+        stream, output_writer = self.verifier.ingest(urls, output_writer, on_done)
+        tasks = [asyncio.create_task(self._dispatch(stream)),
+                 asyncio.create_task(self._collect(output_writer, on_done))]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            self._stop()
+            raise
+        for process in self._processes:
+            await asyncio.to_thread(process.join)
+        if self.verifier.report_summary:
+            for line in URLVerifier.summary(merge_stats([self.verifier.stats()] + results[1])):
+                self.logger.report(line)
+
+    async def _dispatch(self, stream):
+        batches = [[] for _ in range(self.workers)]
+        sent_at = time.monotonic()
+        incoming = ready_batches(stream, BATCH_SIZE)
+        # Waited on with a timeout, so partly filled batches go out even while the input is idle.
+        arriving = asyncio.ensure_future(incoming.__anext__())
+        try:
+            while True:
+                timeout = max(0, sent_at + BATCH_DELAY - time.monotonic()) if any(batches) else None
+                done, _ = await asyncio.wait({arriving}, timeout=timeout)
+                if done:
+                    try:
+                        jobs = arriving.result()
+                    except StopAsyncIteration:
+                        break
+                    for job in jobs:
+                        batches[shard_for(job.url, self.workers)].append(job)
+                    arriving = asyncio.ensure_future(incoming.__anext__())
+                due = time.monotonic() - sent_at >= BATCH_DELAY
+                for index, batch in enumerate(batches):
+                    if len(batch) >= BATCH_SIZE or (due and batch):
+                        await self._put(self._inboxes[index], batch)
+                        batches[index] = []
+                        sent_at = time.monotonic()
+        finally:
+            arriving.cancel()
+        for index, batch in enumerate(batches):
+            if batch:
+                await self._put(self._inboxes[index], batch)
+            await self._put(self._inboxes[index], None)
+
+    async def _collect(self, output_writer, on_done):
+        summaries = {}
+        while len(summaries) < self.workers:
+            message = await self._get()
+            if message[0] == "summary":
+                summaries[message[1]] = message[2]
+                if message[2]["metrics"]:
+                    self._metrics[message[1]] = message[2]["metrics"]
+                continue
+            for kind, value in message[1]:
+                if kind == "metrics":
+                    self._metrics[value[0]] = value[1]
+                elif kind == "result":
+                    if self.verifier.result_store:
+                        self.verifier.result_store.add(value)
+                    await output_writer.write_result(value)
+                elif on_done:
+                    on_done(value)
+        return list(summaries.values())
+
+    async def _put(self, inbox, item):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                return await loop.run_in_executor(None, inbox.put, item, True, POLL_INTERVAL)
+            except queue.Full:
+                self._check_alive()
+
+    async def _get(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                return await loop.run_in_executor(None, self._outbox.get, True, POLL_INTERVAL)
+            except queue.Empty:
+                self._check_alive()
+
+    def _check_alive(self):
+        for process in self._processes:
+            if process.exitcode not in (None, 0):
+                raise RuntimeError(f"Worker process {process.name} exited with code {process.exitcode}")
+
+    def _stop(self):
+        for inbox in self._inboxes:
+            inbox.cancel_join_thread()
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            process.join(5)
+
+
+def shard_main(index, config, debug, logger_options, inbox, outbox):
+    """Entry point of a worker process: check the jobs it is sent until told to stop."""
+    # The parent handles Ctrl-C and stops the workers itself.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if debug:
+        logging.basicConfig(level=logging.DEBUG, format=f"%(asctime)s - verifier-{index} - %(levelname)s - %(message)s")
+    logger = Logger(**logger_options)
+    try:
+        asyncio.run(_check_shard(index, config, logger, inbox, outbox))
+    finally:
+        logger.close()
+
+
+async def _check_shard(index, config, logger, inbox, outbox):
+    loop = asyncio.get_running_loop()
+    verifier = URLVerifier.from_config(config, logger, result_store=None, deduplicator=None)
+    verifier.report_summary = False
+    sender = ShardWriter(outbox, index, verifier.metrics)
+
+    async def jobs():
+        while True:
+            batch = await loop.run_in_executor(None, inbox.get)
+            if batch is None:
+                return
+            for job in batch:
+                yield job
+
+    async with sender:
+        async with verifier:
+            await verifier.process_stream(jobs(), sender, on_done=sender.done)
+    if verifier.dns_cache:
+        await verifier.dns_cache.shutdown()
+    await loop.run_in_executor(None, outbox.put, ("summary", index, verifier.stats()))
+
+
+class ShardWriter:
+    """Writer for a worker process: passes results and finished jobs back to the parent in order."""
+
+    def __init__(self, outbox, index=0, metrics=None):
+        self.outbox = outbox
+        self.index = index
+        self.metrics = metrics
+        self._events = []
+        self._flusher = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        self._flusher = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        await self.flush()
+
+    async def write_result(self, result):
+        self._events.append(("result", result))
+        if len(self._events) >= BATCH_SIZE:
+            await self.flush()
+
+    def done(self, job):
+        self._events.append(("done", job))
+
+    async def flush(self):
+        # One put at a time, so a job's "done" never overtakes its result.
+        async with self._lock:
+            if self._events:
+                events, self._events = self._events, []
+                await asyncio.get_running_loop().run_in_executor(None, self.outbox.put, ("events", events))
+
+    async def _flush_periodically(self):
+        reported = time.monotonic()
+        while True:
+            await asyncio.sleep(BATCH_DELAY)
+            if self.metrics and time.monotonic() - reported >= METRICS_INTERVAL:
+                self._events.append(("metrics", (self.index, self.metrics.snapshot())))
+                reported = time.monotonic()
+            await self.flush()
\ No newline at end of file
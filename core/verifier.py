@@ -3,26 +3,76 @@ import asyncio
 import certifi
 import ssl
 import random
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
 from urllib.parse import urlparse, urlunparse
 from .logger import Logger
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import undetected_chromedriver as uc
+from .records import CheckResult, Job
+from .host_scheduler import HostScheduler, host_key
+from .circuit_breaker import CircuitBreaker, origin_key
+from .dns_cache import DNSCache
+from .retry import Retry, RetryPolicy
+from .fallback import BrowserPool, Escalation, EscalationQueue, ScraperPool, chrome_driver
+from .metrics import Metrics, merge_snapshots, summary as metrics_summary
+from .method_learner import HEAD_REJECTED, PROBE_HEADERS, MethodLearner
+from .batching import ready_batches
+from .concurrency import AdaptiveLimiter
 
 class URLVerifier:
-    def __init__(self, timeout, max_retries, concurrency, valid_status_codes, logger: Logger, use_get_fallback=False, disable_ssl_verification=False, scraper=None):
+    def __init__(self, timeout, max_retries, concurrency, valid_status_codes, logger: Logger, use_get_fallback=False, disable_ssl_verification=False, scraper=None, queue_size=None,
+                 per_host_concurrency=None, per_host_rate=None, per_host_burst=1, max_retry_after=60,
+                 dns_cache=None, dns_prefetch_batch=None, dns_prefetch_concurrency=50,
+                 circuit_breaker=None, result_store=None, result_store_batch=500,
+                 deduplicator=None, retry_policy=None, scraper_threads=4, browser_pool_size=1,
+                 browser_max_pages=50, browser_factory=None, metrics=None, method_learner=None,
+                 concurrency_limiter=None, escalation_queue_size=1000, spill_dir=None):
         self.timeout = timeout
         self.max_retries = max_retries
-        self.semaphore = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.queue_size = queue_size or max(concurrency * 2, 1000)
+        # An AdaptiveLimiter moves the limit at runtime; enough workers and connections are kept for its maximum.
+        self.limiter = concurrency_limiter
+        self.semaphore = concurrency_limiter or asyncio.Semaphore(concurrency)
+        self.max_concurrency = concurrency_limiter.max_limit if concurrency_limiter else concurrency
+        self.per_host_concurrency = per_host_concurrency or concurrency
+        self.per_host_rate = per_host_rate
+        self.per_host_burst = per_host_burst
+        self.max_retry_after = max_retry_after
+        self.scheduler = None
+        self.dns_cache = dns_cache
+        self.dns_prefetch_batch = dns_prefetch_batch
+        self.dns_prefetch_concurrency = dns_prefetch_concurrency
+        self.circuit_breaker = circuit_breaker
+        self.result_store = result_store
+        self.result_store_batch = result_store_batch
+        self.deduplicator = deduplicator
+        self.retry_policy = retry_policy or RetryPolicy()
         self.valid_status_codes = valid_status_codes
         self.logger = logger
         self.use_get_fallback = use_get_fallback
         self.disable_ssl_verification = disable_ssl_verification
-        self.scraper = scraper
+        if scraper is not None:
+            self.scraper_pool = ScraperPool(1, factory=lambda: scraper)
+        else:
+            self.scraper_pool = ScraperPool(scraper_threads)
+        self.browser_pool = BrowserPool(
+            browser_pool_size,
+            factory=browser_factory or (lambda: chrome_driver(random.choice(self.user_agents))),
+            max_pages=browser_max_pages
+        )
+        self.fallback_concurrency = self.scraper_pool.size + browser_pool_size
+        self.escalation_queue_size = escalation_queue_size
+        self.spill_dir = spill_dir
+        self.metrics = metrics
+        self.method_learner = method_learner
         self.session = None
-        self.failure_counts = {"connection": 0, "ssl": 0, "status": 0, "timeout": 0, "client": 0, "other": 0}
+        self.insecure_session = None
+        self.failure_counts = {"dns": 0, "connection": 0, "ssl": 0, "status": 0, "timeout": 0, "client": 0, "circuit": 0, "other": 0}
         self.total_urls = 0
         self.successful_urls = 0
+        self.cached_urls = 0
+        self.report_summary = True
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -31,9 +81,57 @@ class URLVerifier:
         if disable_ssl_verification:
             self.logger.warning("SSL verification is disabled globally. Use with caution.")
 
+    @classmethod
+    def from_config(cls, config, logger, **overrides):
+        """Build a verifier from config.yaml settings; keyword arguments override them.
+
+        The DNS cache and circuit breaker are only created when not passed in.
+        """
+        options = dict(
+            use_get_fallback=config.get('use_get_fallback', False),
+            disable_ssl_verification=config.get('disable_ssl_verification', False),
+            queue_size=config.get('queue_size'),
+            per_host_concurrency=config.get('per_host_concurrency'),
+            per_host_rate=config.get('per_host_rate'),
+            per_host_burst=config.get('per_host_burst', 1),
+            max_retry_after=config.get('max_retry_after', 60),
+            dns_prefetch_batch=config.get('dns_prefetch_batch'),
+            dns_prefetch_concurrency=config.get('dns_prefetch_concurrency', 50),
+            scraper_threads=config.get('scraper_threads', 4),
+            browser_pool_size=config.get('browser_pool_size', 1),
+            browser_max_pages=config.get('browser_max_pages', 50),
+            escalation_queue_size=config.get('escalation_queue_size', 1000),
+            metrics=Metrics() if config.get('metrics', True) else None,
+            retry_policy=RetryPolicy(
+                backoff=config.get('retry_backoff'),
+                max_delay=config.get('retry_max_delay', 60),
+                budget_ratio=config.get('retry_budget', 0.2),
+                budget_min=config.get('retry_budget_min', 100)
+            )
+        )
+        options.update(overrides)
+        if 'dns_cache' not in options and config.get('dns_cache', True):
+            options['dns_cache'] = DNSCache(ttl=config.get('dns_ttl', 300), negative_ttl=config.get('dns_negative_ttl', 600))
+        if 'circuit_breaker' not in options and config.get('circuit_breaker', True):
+            options['circuit_breaker'] = CircuitBreaker(config.get('breaker_threshold', 5), config.get('breaker_cooldown', 60))
+        if 'concurrency_limiter' not in options and config.get('adaptive_concurrency'):
+            options['concurrency_limiter'] = AdaptiveLimiter(
+                config['concurrency'],
+                min_limit=config.get('concurrency_min', 1),
+                max_limit=config.get('concurrency_max'),
+                max_error_rate=config.get('concurrency_max_error_rate', 0.05),
+                tolerance=config.get('concurrency_latency_tolerance', 2.0),
+                fd_reserve=config.get('concurrency_fd_reserve', 64),
+                log=logger.debug
+            )
+        if 'method_learner' not in options and config.get('learn_methods', True):
+            options['method_learner'] = MethodLearner(config.get('learn_methods_threshold', 2))
+        return cls(config['timeout'], config['max_retries'], config['concurrency'], config['status_codes'], logger, **options)
+
     async def __aenter__(self):
         ssl_context = None if self.disable_ssl_verification else ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
+        connector = aiohttp.TCPConnector(ssl=ssl_context, limit=self.max_concurrency, limit_per_host=self.per_host_concurrency,
+                                         resolver=self.dns_cache, use_dns_cache=self.dns_cache is None)
         headers = {
             "User-Agent": random.choice(self.user_agents),
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
@@ -47,20 +145,71 @@ class URLVerifier:
             "Sec-Fetch-Dest": "document",
             "Upgrade-Insecure-Requests": "1"
         }
-        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout), connector=connector, headers=headers)
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout), connector=connector, headers=headers,
+                                             trace_configs=self.trace_configs())
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
         if self.session:
             await self.session.close()
             self.session = None
-        self.logger.info(f"Summary: Total URLs: {self.total_urls}, Successful: {self.successful_urls}, "
-                         f"Connection failures: {self.failure_counts['connection']}, "
-                         f"SSL failures: {self.failure_counts['ssl']}, "
-                         f"Status failures: {self.failure_counts['status']}, "
-                         f"Timeout failures: {self.failure_counts['timeout']}, "
-                         f"Client failures: {self.failure_counts['client']}, "
-                         f"Other failures: {self.failure_counts['other']}")
+        if self.insecure_session:
+            await self.insecure_session.close()
+            self.insecure_session = None
+        await asyncio.to_thread(self.scraper_pool.close)
+        await asyncio.to_thread(self.browser_pool.close)
+        if self.report_summary:
+            for line in self.summary(self.stats()):
+                self.logger.report(line)
+
+    def trace_configs(self):
+        return [self.metrics.trace_config()] if self.metrics else None
+
+    def stats(self):
+        """Run counters as plain data, e.g. to merge across processes with merge_stats()."""
+        return {
+            "total_urls": self.total_urls,
+            "successful_urls": self.successful_urls,
+            "cached_urls": self.cached_urls,
+            "duplicates": self.deduplicator.duplicates if self.deduplicator else 0,
+            "retries": self.retry_policy.retries,
+            "retries_denied": self.retry_policy.denied,
+            "failure_counts": dict(self.failure_counts),
+            "circuit_breaker": self.circuit_breaker.stats() if self.circuit_breaker else None,
+            "method_learner": self.method_learner.stats() if self.method_learner else None,
+            "concurrency": self.limiter.stats() if self.limiter else None,
+            "metrics": self.metrics.snapshot() if self.metrics else None
+        }
+
+    @staticmethod
+    def summary(stats):
+        """Format run counters as end-of-run summary lines."""
+        failure_counts = stats["failure_counts"]
+        lines = [f"Summary: Total URLs: {stats['total_urls']}, Successful: {stats['successful_urls']}, "
+                 f"Served from cache: {stats['cached_urls']}, "
+                 f"Duplicates: {stats['duplicates']}, "
+                 f"Retries: {stats['retries']} ({stats['retries_denied']} over budget), "
+                 f"DNS failures: {failure_counts['dns']}, "
+                 f"Connection failures: {failure_counts['connection']}, "
+                 f"SSL failures: {failure_counts['ssl']}, "
+                 f"Status failures: {failure_counts['status']}, "
+                 f"Timeout failures: {failure_counts['timeout']}, "
+                 f"Client failures: {failure_counts['client']}, "
+                 f"Circuit-open failures: {failure_counts['circuit']}, "
+                 f"Other failures: {failure_counts['other']}"]
+        if stats["circuit_breaker"]:
+            lines += CircuitBreaker().summary(stats=stats["circuit_breaker"])
+        if stats.get("method_learner"):
+            learner = stats["method_learner"]
+            lines.append(f"HEAD rejected: {learner['switched']} hosts switched to GET-only, "
+                         f"{learner['heads_skipped']} HEAD requests skipped")
+        if stats.get("concurrency"):
+            limiter = stats["concurrency"]
+            lines.append(f"Adaptive concurrency: limit {limiter['limit']} (ranged {limiter['lowest']}-{limiter['highest']}), "
+                         f"{limiter['adjustments']} adjustments, last: {limiter['last_reason'] or 'none'}")
+        if stats["metrics"]:
+            lines += metrics_summary(stats["metrics"])
+        return lines
 
     def normalize_url(self, url):
         """Add scheme if missing and normalize URL."""
@@ -71,227 +220,537 @@ class URLVerifier:
         parsed = urlparse(url)
         return urlunparse(parsed._replace(fragment=''))
 
+    def retry_after_delay(self, value):
+        """Parse a Retry-After header (seconds or HTTP date), capped at max_retry_after."""
+        delay = 2
+        if value:
+            try:
+                delay = float(value)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    pass
+        return min(max(delay, 0), self.max_retry_after)
+
+    def is_ok(self, status, headers=None):
+        """A valid status, or 304 Not Modified in answer to a conditional request."""
+        return status in self.valid_status_codes or (status == 304 and bool(headers))
+
+    def head_rejected(self, response, headers=None):
+        """True if a HEAD answer means the URL should be tried with GET."""
+        return response.status in HEAD_REJECTED and self.use_get_fallback and not self.is_ok(response.status, headers)
+
+    def get_only(self, url):
+        """True if the URL's host is known to reject HEAD."""
+        return self.use_get_fallback and self.method_learner is not None and self.method_learner.get_only(host_key(url))
+
+    @staticmethod
+    def probe_headers(headers=None):
+        """Request headers for a GET probe: only the first byte is asked for."""
+        return {**(headers or {}), **PROBE_HEADERS}
+
+    @staticmethod
+    def probe_status(response):
+        """Status of a GET probe, where 206 (first byte sent) and 416 (empty resource) mean the page is there."""
+        return 200 if response.status in (206, 416) else response.status
+
+    def learn(self, url, head_rejected, get_ok=False):
+        """Tell the method learner how a HEAD (and possibly a GET probe) went."""
+        if self.method_learner is None:
+            return
+        if not head_rejected:
+            self.method_learner.head_honoured(host_key(url))
+        elif get_ok:
+            self.method_learner.head_rejected(host_key(url))
+
+    async def record(self, output_writer, url, ok, started, category=None, status=None, method=None, response=None, reason=None, headers=None):
+        """Count a URL's final outcome and hand it to the writer as a CheckResult."""
+        if ok:
+            self.successful_urls += 1
+        else:
+            self.failure_counts[category] += 1
+        etag = last_modified = None
+        if response is not None:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        if status == 304 and headers:
+            etag = etag or headers.get("If-None-Match")
+            last_modified = last_modified or headers.get("If-Modified-Since")
+        result = CheckResult(
+            url,
+            ok,
+            status=status,
+            category=category,
+            method=method,
+            redirect=str(response.url) if response is not None and response.history else None,
+            latency=round(time.monotonic() - started, 3) if started else None,
+            reason=reason,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if self.result_store and url:
+            self.result_store.add(result)
+        if self.metrics and method:
+            self.metrics.method(method)
+        await output_writer.write_result(result)
+
+    async def check_dns(self, url, output_writer, started=None):
+        """Fail a URL without any HTTP attempt if its host is known not to resolve."""
+        if not self.dns_cache:
+            return False
+        error = self.dns_cache.failure(host_key(url))
+        if not error:
+            return False
+        self.logger.error(f"{url} — Failed: DNS Error ({error})")
+        await self.record(output_writer, url, False, started, category="dns", method="dns", reason=error)
+        return True
+
+    async def check_circuit(self, url, output_writer, started=None):
+        """Fail a URL straight away if its origin's circuit is open."""
+        if not self.circuit_breaker:
+            return False
+        reason = self.circuit_breaker.allow(origin_key(url))
+        if not reason:
+            return False
+        self.logger.error(f"{url} — Failed: Circuit Open ({reason})")
+        await self.record(output_writer, url, False, started, category="circuit", method="circuit", reason=reason)
+        return True
+
     async def check_url_selenium(self, url):
-        """Check URL using Selenium with undetected-chromedriver."""
+        """Check URL by loading it in a pooled headless browser."""
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument(f"user-agent={random.choice(self.user_agents)}")
-            driver = uc.Chrome(options=chrome_options, enable_cdp_events=True)
-            try:
-                driver.get(url)
-                await asyncio.sleep(3)  # Wait for page load
-                page_source = driver.page_source
-                if any(code in page_source for code in ["200", "301", "302"]) or ("<title>" in page_source and ("X" in driver.title or "Twitter" in driver.title)):
-                    self.logger.success(f"{url} — OK (Selenium fallback)")
-                    return True
-                else:
-                    self.logger.error(f"{url} — Failed: Invalid page content (Selenium fallback)")
-                    return False
-            finally:
-                driver.quit()
+            page_source, title = await self.browser_pool.load(url)
+            if any(code in page_source for code in ["200", "301", "302"]) or ("<title>" in page_source and ("X" in title or "Twitter" in title)):
+                self.logger.success(f"{url} — OK (Selenium fallback)")
+                return True
+            else:
+                self.logger.error(f"{url} — Failed: Invalid page content (Selenium fallback)")
+                return False
         except Exception as e:
             self.logger.error(f"{url} — Failed: Selenium Fallback Error ({str(e)})")
             return False
 
-    async def check_url(self, url, output_writer):
-        """Check URL status with retries, HEAD-to-GET fallback, SSL fallback, cloudscraper fallback, and selenium fallback."""
+    async def check_url(self, url, output_writer, attempt=0, headers=None, started=None):
+        """Make one attempt at a URL: HEAD, with GET fallback, SSL fallback, cloudscraper fallback, and selenium fallback.
+
+        `headers` are extra request headers, e.g. If-None-Match/If-Modified-Since
+        when revalidating a stored result; a 304 then counts as working.
+        `started` is when the first attempt began, so the latency written out
+        covers every retry and not just this attempt.
+
+        Returns a Retry if the URL should go back to the scheduler (after a
+        failure that is worth retrying, or a 429 with Retry-After), or an
+        Escalation if it needs the slow fallbacks, instead of being written
+        out. The concurrency slot is only held during the requests
+        themselves, never while waiting to retry.
+        """
         url = self.normalize_url(url)
         if not url:
             self.logger.error(f"Invalid URL: {url}")
-            self.failure_counts["other"] += 1
             self.total_urls += 1
-            await output_writer.write_not_working(url)
+            await self.record(output_writer, url, False, None, category="other", reason="Invalid URL")
             return
 
-        self.total_urls += 1
-        for attempt in range(self.max_retries + 1):
+        started = started or time.monotonic()
+        if attempt == 0:
+            self.total_urls += 1
+            self.retry_policy.request()
+        if await self.check_dns(url, output_writer, started):
+            return
+        if await self.check_circuit(url, output_writer, started):
+            return
+        get_only = self.get_only(url)
+        method = "GET" if get_only else "HEAD"
+        try:
             async with self.semaphore:
+                if not get_only:
+                    async with self.session.head(url, allow_redirects=True, headers=headers) as response:
+                        pass
+                    rejected = self.head_rejected(response, headers)
+                    if not rejected:
+                        self.learn(url, False)
+                if get_only or rejected:
+                    # A probe: the body is never read, so the connection is free once the headers are in.
+                    method = "GET"
+                    async with self.session.get(url, allow_redirects=True, headers=self.probe_headers(headers)) as response:
+                        pass
+                    if not get_only:
+                        self.learn(url, True, self.is_ok(self.probe_status(response), headers))
+        except aiohttp.ClientSSLError:
+            retry = self.retry(url, attempt, "ssl", "SSL Error")
+            if retry:
+                return retry
+            await self.check_url_without_ssl(url, output_writer, started, headers)
+            return
+        except aiohttp.ClientConnectionError as e:
+            if await self.check_dns(url, output_writer, started):
+                return
+            if self.circuit_breaker:
+                self.circuit_breaker.record_failure(origin_key(url), f"Connection Error ({str(e)})")
+            retry = self.retry(url, attempt, "connection", "Connection Error")
+            if retry:
+                return retry
+            self.logger.error(f"{url} — Failed: Connection Error ({str(e)})")
+            await self.record(output_writer, url, False, started, category="connection", method=method, reason=str(e))
+            return
+        except asyncio.TimeoutError:
+            error = "Timeout Error" if method == "HEAD" else "Timeout Error (GET)"
+            if self.circuit_breaker:
+                self.circuit_breaker.record_failure(origin_key(url), error)
+            retry = self.retry(url, attempt, "timeout", error)
+            if retry:
+                return retry
+            self.logger.error(f"{url} — Failed: {error}")
+            await self.record(output_writer, url, False, started, category="timeout", method=method, reason="Timeout Error")
+            return
+        except aiohttp.ClientError as e:
+            retry = self.retry(url, attempt, "client", "Client Error")
+            if retry:
+                return retry
+            self.logger.warning(f"Queueing {url} for the cloudscraper fallback")
+            return Escalation(self.retry_policy.delay("client", attempt))
+
+        status = response.status if method == "HEAD" else self.probe_status(response)
+        label = "" if method == "HEAD" else " (GET)" if get_only else " (GET fallback)"
+        if self.circuit_breaker:
+            self.circuit_breaker.record_success(origin_key(url))
+        if self.is_ok(status, headers):
+            self.logger.success(f"{url} — {status} OK{label}")
+            await self.record(output_writer, url, True, started, status=status, method=method, response=response, headers=headers)
+            return
+        if status == 400 and method == "GET":
+            retry = self.retry(url, attempt, "status", "400 Error (GET)")
+            if retry:
+                return retry
+        if status in (429, 503) and self.scheduler and attempt < self.max_retries:
+            delay = self.retry_after_delay(response.headers.get("Retry-After"))
+            self.logger.warning(f"Deferring {host_key(url)} for {delay:.0f}s — {status} (Attempt {attempt + 1}/{self.max_retries})")
+            self.scheduler.delay_host(host_key(url), delay)
+            return Retry(attempt + 1)
+        self.logger.error(f"{url} — {status} Failed{label}")
+        await self.record(output_writer, url, False, started, category="status", status=status, method=method)
+
+    def retry(self, url, attempt, category, error):
+        """Return a Retry with a backoff delay, or None if attempts or the retry budget are used up."""
+        if attempt >= self.max_retries:
+            return None
+        if not self.retry_policy.allow():
+            if self.retry_policy.denied == 1:
+                self.logger.warning("Retry budget used up — further failures are final without retrying")
+            return None
+        delay = self.retry_policy.delay(category, attempt)
+        self.logger.warning(f"Retrying {url} in {delay:.1f}s (Attempt {attempt + 1}/{self.max_retries}) — {error}")
+        return Retry(attempt + 1, delay)
+
+    async def check_url_without_ssl(self, url, output_writer, started, headers=None):
+        """Last attempt for a URL that keeps failing SSL verification."""
+        self.logger.warning(f"Attempting {url} with SSL verification disabled")
+        if self.insecure_session is None:
+            # Created on first use and kept for the run, like the main session.
+            self.insecure_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(ssl=False, limit=self.max_concurrency, resolver=self.dns_cache,
+                                               use_dns_cache=self.dns_cache is None),
+                headers=self.session.headers,
+                trace_configs=self.trace_configs()
+            )
+        get_only = self.get_only(url)
+        try:
+            async with self.semaphore:
+                method = "HEAD (SSL fallback)"
+                if not get_only:
+                    async with self.insecure_session.head(url, allow_redirects=True, headers=headers) as response:
+                        pass
+                    rejected = self.head_rejected(response, headers)
+                    if not rejected:
+                        self.learn(url, False)
+                if get_only or rejected:
+                    method = "GET (SSL fallback)"
+                    async with self.insecure_session.get(url, allow_redirects=True, headers=self.probe_headers(headers)) as response:
+                        pass
+                    if not get_only:
+                        self.learn(url, True, self.is_ok(self.probe_status(response), headers))
+        except (aiohttp.ClientSSLError, aiohttp.ClientConnectionError, asyncio.TimeoutError, aiohttp.ClientError) as e:
+            self.logger.error(f"{url} — Failed: SSL Fallback Error ({str(e)})")
+            await self.record(output_writer, url, False, started, category="ssl", method="HEAD (SSL fallback)", reason=str(e))
+            return
+        status = response.status if method.startswith("HEAD") else self.probe_status(response)
+        label = "SSL fallback" if method.startswith("HEAD") else "GET and SSL fallback"
+        if self.is_ok(status, headers):
+            self.logger.success(f"{url} — {status} OK ({label})")
+            await self.record(output_writer, url, True, started, status=status, method=method, response=response, headers=headers)
+        else:
+            self.logger.error(f"{url} — {status} Failed ({label})")
+            await self.record(output_writer, url, False, started, category="status", status=status, method=method)
+
+    async def check_url_fallback(self, url, output_writer, started=None):
+        """Fallback stage for URLs aiohttp keeps failing on: cloudscraper, then selenium."""
+        started = started or time.monotonic()
+        self.logger.warning(f"Attempting {url} with cloudscraper fallback")
+        try:
+            response = await self.scraper_pool.get(url, allow_redirects=True)
+            status = response.status_code
+            if status in self.valid_status_codes:
+                self.logger.success(f"{url} — {status} OK (Cloudscraper fallback)")
+                await self.record(output_writer, url, True, started, status=status, method="cloudscraper")
+                return
+            elif status == 403:
+                self.logger.warning(f"Retrying {url} with alternate cloudscraper headers")
                 try:
-                    async with self.session.head(url, allow_redirects=True) as response:
-                        status = response.status
-                        if status in self.valid_status_codes:
-                            self.logger.success(f"{url} — {status} OK")
-                            self.successful_urls += 1
-                            await output_writer.write_working(url)
-                            return
-                        elif status in [400, 403] and self.use_get_fallback:
-                            try:
-                                async with self.session.get(url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=self.timeout + 4)) as get_response:
-                                    status = get_response.status
-                                    if status in self.valid_status_codes:
-                                        self.logger.success(f"{url} — {status} OK (GET fallback)")
-                                        self.successful_urls += 1
-                                        await output_writer.write_working(url)
-                                        return
-                                    elif status == 400 and attempt < self.max_retries:
-                                        self.logger.warning(f"Retrying {url} (Attempt {attempt + 1}/{self.max_retries}) — 400 Error (GET)")
-                                        await asyncio.sleep(2)
-                                        continue
-                                    else:
-                                        self.logger.error(f"{url} — {status} Failed (GET fallback)")
-                                        self.failure_counts["status"] += 1
-                                        await output_writer.write_not_working(url)
-                                        return
-                            except asyncio.TimeoutError:
-                                if attempt < self.max_retries:
-                                    self.logger.warning(f"Retrying {url} (Attempt {attempt + 1}/{self.max_retries}) — Timeout Error (GET)")
-                                    await asyncio.sleep(2)
-                                else:
-                                    self.logger.error(f"{url} — Failed: Timeout Error (GET)")
-                                    self.failure_counts["timeout"] += 1
-                                    await output_writer.write_not_working(url)
-                                    return
-                        else:
-                            self.logger.error(f"{url} — {status} Failed")
-                            self.failure_counts["status"] += 1
-                            await output_writer.write_not_working(url)
-                            return
-                except aiohttp.ClientSSLError as e:
-                    if attempt < self.max_retries:
-                        self.logger.warning(f"Retrying {url} (Attempt {attempt + 1}/{self.max_retries}) — SSL Error")
-                        await asyncio.sleep(2)
-                    else:
-                        self.logger.warning(f"Attempting {url} with SSL verification disabled")
-                        try:
-                            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout), connector=aiohttp.TCPConnector(ssl=False), headers={
-                                "User-Agent": random.choice(self.user_agents),
-                                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                                "Accept-Language": "en-US,en;q=0.5",
-                                "Accept-Encoding": "gzip, deflate, br",
-                                "Connection": "keep-alive",
-                                "Referer": "https://www.google.com/",
-                                "DNT": "1",
-                                "Sec-Fetch-Site": "none",
-                                "Sec-Fetch-Mode": "navigate",
-                                "Sec-Fetch-Dest": "document",
-                                "Upgrade-Insecure-Requests": "1"
-                            }) as temp_session:
-                                async with temp_session.head(url, allow_redirects=True) as response:
-                                    status = response.status
-                                    if status in self.valid_status_codes:
-                                        self.logger.success(f"{url} — {status} OK (SSL fallback)")
-                                        self.successful_urls += 1
-                                        await output_writer.write_working(url)
-                                        return
-                                    elif status in [400, 403] and self.use_get_fallback:
-                                        async with temp_session.get(url, allow_redirects=True, timeout=aiohttp.ClientTimeout(total=self.timeout + 4)) as get_response:
-                                            status = get_response.status
-                                            if status in self.valid_status_codes:
-                                                self.logger.success(f"{url} — {status} OK (GET and SSL fallback)")
-                                                self.successful_urls += 1
-                                                await output_writer.write_working(url)
-                                                return
-                                            else:
-                                                self.logger.error(f"{url} — {status} Failed (GET and SSL fallback)")
-                                                self.failure_counts["status"] += 1
-                                                await output_writer.write_not_working(url)
-                                                return
-                                    else:
-                                        self.logger.error(f"{url} — {status} Failed (SSL fallback)")
-                                        self.failure_counts["status"] += 1
-                                        await output_writer.write_not_working(url)
-                                        return
-                        except (aiohttp.ClientSSLError, aiohttp.ClientConnectionError, asyncio.TimeoutError, aiohttp.ClientError) as e:
-                            self.logger.error(f"{url} — Failed: SSL Fallback Error ({str(e)})")
-                            self.failure_counts["ssl"] += 1
-                            await output_writer.write_not_working(url)
-                            return
-                except aiohttp.ClientConnectionError as e:
-                    if attempt < self.max_retries:
-                        self.logger.warning(f"Retrying {url} (Attempt {attempt + 1}/{self.max_retries}) — Connection Error")
-                        await asyncio.sleep(2)
-                    else:
-                        self.logger.error(f"{url} — Failed: Connection Error ({str(e)})")
-                        self.failure_counts["connection"] += 1
-                        await output_writer.write_not_working(url)
+                    alternate_headers = {
+                        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Firefox/91.0",
+                        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+                        "Accept-Language": "en-US,en;q=0.5",
+                        "Accept-Encoding": "gzip, deflate, br",
+                        "Connection": "keep-alive",
+                        "Referer": "https://www.bing.com/",
+                        "DNT": "1",
+                        "Sec-Fetch-Site": "none",
+                        "Sec-Fetch-Mode": "navigate",
+                        "Sec-Fetch-Dest": "document",
+                        "Upgrade-Insecure-Requests": "1"
+                    }
+                    response = await self.scraper_pool.get(url, headers=alternate_headers, allow_redirects=True)
+                    status = response.status_code
+                    if status in self.valid_status_codes:
+                        self.logger.success(f"{url} — {status} OK (Cloudscraper alternate fallback)")
+                        await self.record(output_writer, url, True, started, status=status, method="cloudscraper (alternate headers)")
                         return
-                except asyncio.TimeoutError as e:
-                    if attempt < self.max_retries:
-                        self.logger.warning(f"Retrying {url} (Attempt {attempt + 1}/{self.max_retries}) — Timeout Error")
-                        await asyncio.sleep(2)
                     else:
-                        self.logger.error(f"{url} — Failed: Timeout Error")
-                        self.failure_counts["timeout"] += 1
-                        await output_writer.write_not_working(url)
+                        self.logger.error(f"{url} — {status} Failed (Cloudscraper alternate fallback)")
+                        await self.record(output_writer, url, False, started, category="status", status=status, method="cloudscraper (alternate headers)")
                         return
-                except aiohttp.ClientError as e:
-                    if attempt < self.max_retries:
-                        self.logger.warning(f"Retrying {url} (Attempt {attempt + 1}/{self.max_retries}) — Client Error")
-                        await asyncio.sleep(2)
-                    else:
-                        self.logger.warning(f"Attempting {url} with cloudscraper fallback")
-                        await asyncio.sleep(3)  # Increased delay
-                        try:
-                            response = await asyncio.get_event_loop().run_in_executor(None, lambda: self.scraper.get(url, allow_redirects=True))
-                            status = response.status_code
-                            if status in self.valid_status_codes:
-                                self.logger.success(f"{url} — {status} OK (Cloudscraper fallback)")
-                                self.successful_urls += 1
-                                await output_writer.write_working(url)
-                                return
-                            elif status == 403:
-                                self.logger.warning(f"Retrying {url} with alternate cloudscraper headers")
-                                try:
-                                    alternate_headers = {
-                                        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Firefox/91.0",
-                                        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                                        "Accept-Language": "en-US,en;q=0.5",
-                                        "Accept-Encoding": "gzip, deflate, br",
-                                        "Connection": "keep-alive",
-                                        "Referer": "https://www.bing.com/",
-                                        "DNT": "1",
-                                        "Sec-Fetch-Site": "none",
-                                        "Sec-Fetch-Mode": "navigate",
-                                        "Sec-Fetch-Dest": "document",
-                                        "Upgrade-Insecure-Requests": "1"
-                                    }
-                                    response = await asyncio.get_event_loop().run_in_executor(None, lambda: self.scraper.get(url, headers=alternate_headers, allow_redirects=True))
-                                    status = response.status_code
-                                    if status in self.valid_status_codes:
-                                        self.logger.success(f"{url} — {status} OK (Cloudscraper alternate fallback)")
-                                        self.successful_urls += 1
-                                        await output_writer.write_working(url)
-                                        return
-                                    else:
-                                        self.logger.error(f"{url} — {status} Failed (Cloudscraper alternate fallback)")
-                                        self.failure_counts["status"] += 1
-                                        await output_writer.write_not_working(url)
-                                        return
-                                except Exception as e:
-                                    self.logger.error(f"{url} — Failed: Cloudscraper Alternate Fallback Error ({str(e)})")
-                                    self.failure_counts["client"] += 1
-                                    await output_writer.write_not_working(url)
-                                    return
-                            else:
-                                self.logger.error(f"{url} — {status} Failed (Cloudscraper fallback)")
-                                self.failure_counts["status"] += 1
-                                # Attempt Selenium fallback
-                                self.logger.warning(f"Attempting {url} with selenium fallback")
-                                success = await self.check_url_selenium(url)
-                                if success:
-                                    self.successful_urls += 1
-                                    await output_writer.write_working(url)
-                                else:
-                                    self.failure_counts["client"] += 1
-                                    await output_writer.write_not_working(url)
-                                return
-                        except Exception as e:
-                            self.logger.error(f"{url} — Failed: Cloudscraper Fallback Error ({str(e)})")
-                            self.failure_counts["client"] += 1
-                            # Attempt Selenium fallback
-                            self.logger.warning(f"Attempting {url} with selenium fallback")
-                            success = await self.check_url_selenium(url)
-                            if success:
-                                self.successful_urls += 1
-                                await output_writer.write_working(url)
-                            else:
-                                self.failure_counts["client"] += 1
-                                await output_writer.write_not_working(url)
-                            return
+                except Exception as e:
+                    self.logger.error(f"{url} — Failed: Cloudscraper Alternate Fallback Error ({str(e)})")
+                    await self.record(output_writer, url, False, started, category="client", method="cloudscraper (alternate headers)", reason=str(e))
+                    return
+            else:
+                self.logger.error(f"{url} — {status} Failed (Cloudscraper fallback)")
+                # Attempt Selenium fallback
+                self.logger.warning(f"Attempting {url} with selenium fallback")
+                success = await self.check_url_selenium(url)
+                if success:
+                    await self.record(output_writer, url, True, started, method="selenium")
+                else:
+                    await self.record(output_writer, url, False, started, category="client", method="selenium")
+                return
+        except Exception as e:
+            self.logger.error(f"{url} — Failed: Cloudscraper Fallback Error ({str(e)})")
+            # Attempt Selenium fallback
+            self.logger.warning(f"Attempting {url} with selenium fallback")
+            success = await self.check_url_selenium(url)
+            if success:
+                await self.record(output_writer, url, True, started, method="selenium")
+            else:
+                await self.record(output_writer, url, False, started, category="client", method="selenium", reason=str(e))
+
+    async def serve_from_store(self, jobs, output_writer, on_done=None):
+        """Answer jobs checked within the store's TTL from the store, in batches.
+
+        Stale entries pass through with conditional request headers so an
+        unchanged page is revalidated with a 304 instead of a full check.
+        """
+        async for batch in ready_batches(jobs, self.result_store_batch):
+            async for job in self._serve_batch(batch, output_writer, on_done):
+                yield job
+
+    async def _serve_batch(self, batch, output_writer, on_done):
+        stored = await self.result_store.lookup({job.url for job in batch})
+        now = time.time()
+        for job in batch:
+            entry = stored.get(job.url)
+            if entry is None:
+                yield job
+            elif self.result_store.is_fresh(entry, now):
+                self.total_urls += 1
+                self.cached_urls += 1
+                if self.metrics:
+                    self.metrics.method("cache")
+                if entry.ok:
+                    self.successful_urls += 1
+                else:
+                    self.failure_counts[entry.category or "other"] += 1
+                await output_writer.write_result(CheckResult(
+                    job.url, entry.ok, status=entry.status, category=entry.category, method="cache",
+                    etag=entry.etag, last_modified=entry.last_modified
+                ))
+                if on_done:
+                    on_done(job)
+            else:
+                job.headers = entry.validators()
+                yield job
 
     async def process_urls(self, urls, output_writer):
         """Process a chunk of URLs concurrently."""
-        tasks = [self.check_url(url.strip(), output_writer) for url in urls if url.strip()]
-        await asyncio.gather(*tasks)
\ No newline at end of file
+        async def url_stream():
+            for url in urls:
+                yield url
+        await self.process_stream(url_stream(), output_writer)
+
+    def ingest(self, urls, output_writer, on_done=None):
+        """Turn raw input into a stream of Jobs that still need a network check.
+
+        Normalizes URLs, then drops duplicates and answers fresh stored results
+        when those stages are configured. Lines that can't be parsed as a URL
+        are written out as invalid here. Returns the job stream and the writer
+        results must go through (wrapped so duplicates get their copies).
+        """
+        writer = output_writer
+
+        async def normalized():
+            async for entry in urls:
+                if isinstance(entry, Job):
+                    yield entry
+                    continue
+                offset, url = entry if isinstance(entry, tuple) else (None, entry)
+                try:
+                    normalized_url = self.normalize_url(url.strip())
+                except ValueError as e:
+                    self.logger.error(f"Invalid URL: {url.strip()} ({e})")
+                    self.total_urls += 1
+                    await self.record(writer, url.strip(), False, None, category="other", reason="Invalid URL")
+                    if on_done:
+                        on_done(Job(url.strip(), offset=offset))
+                    continue
+                if normalized_url:
+                    yield Job(normalized_url, offset=offset)
+
+        stream = normalized()
+        if self.deduplicator:
+            output_writer = self.deduplicator.resolving(output_writer, on_done)
+            stream = self.deduplicator.filter(stream, output_writer, on_done)
+        if self.result_store:
+            stream = self.serve_from_store(stream, output_writer, on_done)
+        return stream, output_writer
+
+    async def process_stream(self, urls, output_writer, on_done=None):
+        """Check URLs from an async iterable with a fixed pool of workers.
+
+        `urls` yields URL strings or (input offset, URL) pairs. on_done(job) is
+        called once a job's result has been handed to the writer.
+
+        URLs are queued per host in a HostScheduler, which interleaves work
+        across hosts and enforces the per-host concurrency and rate limits.
+        The scheduler is bounded, so input is only consumed as fast as
+        results are produced and memory stays flat regardless of input size.
+        Failed attempts are requeued with their backoff delay, so a worker
+        moves on to other URLs instead of sleeping. URLs that need the slow
+        fallbacks (cloudscraper, browser) are handed to a separate set of
+        `fallback_concurrency` workers, so the HTTP pass never waits on them;
+        past `escalation_queue_size` they wait in a file in `spill_dir`.
+        """
+        scheduler = self.scheduler = HostScheduler(
+            self.per_host_concurrency,
+            rate=self.per_host_rate,
+            burst=self.per_host_burst,
+            max_pending=self.queue_size
+        )
+
+        stream, output_writer = self.ingest(urls, output_writer, on_done)
+        if self.dns_cache and self.dns_prefetch_batch:
+            stream = self.dns_cache.prefetching(stream, lambda job: host_key(job.url), self.dns_prefetch_batch, self.dns_prefetch_concurrency)
+
+        escalations = EscalationQueue(self.escalation_queue_size, self.spill_dir)
+
+        async def worker():
+            while True:
+                entry = await scheduler.get()
+                if entry is None:
+                    return
+                host, job = entry
+                url = job.url
+                retry = None
+                if job.started is None:
+                    job.started = time.monotonic()
+                try:
+                    retry = await self.check_url(url, output_writer, job.attempt, job.headers, job.started)
+                except Exception as e:
+                    self.logger.error(f"{url} — Failed: Unexpected Error ({str(e)})")
+                    await self.record(output_writer, url, False, job.started, category="other", reason=str(e))
+                finally:
+                    scheduler.release(host)
+                if isinstance(retry, Retry):
+                    job.attempt = retry.attempt
+                    scheduler.requeue(host, job, retry.delay)
+                elif isinstance(retry, Escalation):
+                    scheduler.task_done()
+                    escalations.put(time.monotonic() + retry.delay, job)
+                else:
+                    scheduler.task_done()
+                    if on_done:
+                        on_done(job)
+
+        async def fallback_worker():
+            while True:
+                entry = await escalations.get()
+                if entry is None:
+                    return
+                due, job = entry
+                await asyncio.sleep(due - time.monotonic())
+                try:
+                    await self.check_url_fallback(job.url, output_writer, job.started)
+                except Exception as e:
+                    self.logger.error(f"{job.url} — Failed: Unexpected Error ({str(e)})")
+                    await self.record(output_writer, job.url, False, job.started, category="other", reason=str(e))
+                if on_done:
+                    on_done(job)
+
+        async def feed():
+            async for job in stream:
+                await scheduler.put(host_key(job.url), job)
+            scheduler.close()
+
+        async def http_pass():
+            await asyncio.gather(feed(), *(worker() for _ in range(self.max_concurrency)))
+            if escalations.spilled:
+                self.logger.info(f"{escalations.spilled} URLs waiting for the slow fallbacks were spilled to disk; "
+                                 f"{len(escalations)} still to check")
+            escalations.close()
+
+        # A failing worker or reader cancels the rest instead of stalling them.
+        tasks = [asyncio.create_task(http_pass())] + [asyncio.create_task(fallback_worker()) for _ in range(self.fallback_concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            escalations.discard()
+            self.scheduler = None
+
+
+def merge_stats(stats_list):
+    """Combine URLVerifier.stats() from several processes into one."""
+    counters = ("total_urls", "successful_urls", "cached_urls", "duplicates", "retries", "retries_denied")
+    merged = dict.fromkeys(counters, 0)
+    merged.update(failure_counts={}, circuit_breaker=None, method_learner=None, concurrency=None, metrics=None)
+    snapshots = [stats["metrics"] for stats in stats_list if stats.get("metrics")]
+    if snapshots:
+        merged["metrics"] = merge_snapshots(snapshots)
+    for stats in stats_list:
+        for key in counters:
+            merged[key] += stats[key]
+        for category, count in stats["failure_counts"].items():
+            merged["failure_counts"][category] = merged["failure_counts"].get(category, 0) + count
+        breaker = stats["circuit_breaker"]
+        if breaker:
+            total = merged["circuit_breaker"] or {"opened": 0, "short_circuited": 0, "tripped": []}
+            total["opened"] += breaker["opened"]
+            total["short_circuited"] += breaker["short_circuited"]
+            total["tripped"] += breaker["tripped"]
+            merged["circuit_breaker"] = total
+        learner = stats.get("method_learner")
+        if learner:
+            total = merged["method_learner"] or dict.fromkeys(learner, 0)
+            for key, count in learner.items():
+                total[key] += count
+            merged["method_learner"] = total
+        limiter = stats.get("concurrency")
+        if limiter:
+            # Each process has its own limiter: add the limits up, keep the latest reason.
+            total = merged["concurrency"] or {"limit": 0, "lowest": 0, "highest": 0, "adjustments": 0, "last_reason": None}
+            for key in ("limit", "lowest", "highest", "adjustments"):
+                total[key] += limiter[key]
+            total["last_reason"] = limiter["last_reason"] or total["last_reason"]
+            merged["concurrency"] = total
+    return merged
\ No newline at end of file
@@ -6,18 +6,57 @@ from core.chunk_reader import ChunkReader
 from core.output_writer import OutputWriter
 from core.result_folder import ResultFolder
 from core.logger import Logger
-from rich.progress import Progress
+from core.result_store import ResultStore
+from core.checkpoint import Checkpoint
+from core.dedup import Deduplicator
+from core.sharding import ShardedRunner
+from core.service import VerifierService, serve
+from core import metrics
+from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+import signal
 import sys
-import cloudscraper
+import time
 import logging
 
+async def run_service(config, logger, address):
+    """--serve: keep one verifier running and check batches submitted over the API until interrupted."""
+    result_store = None
+    if config.get('result_store'):
+        result_store = ResultStore(config['result_store'], ttl=config.get('result_ttl', 86400),
+                                   failure_ttl=config.get('result_failure_ttl', 0))
+        await result_store.open()
+    # No deduplicator: it would remember every URL for the life of the service.
+    verifier = URLVerifier.from_config(config, logger, result_store=result_store)
+    api = None
+    try:
+        async with VerifierService(verifier, keep_finished=config.get('service_keep_finished', 3600)) as service:
+            api = await serve(service, address)
+            logger.info(f"Serving the verifier API on {address}")
+            await asyncio.Event().wait()
+    except asyncio.CancelledError:
+        logger.info("Service stopped.")
+    finally:
+        if api:
+            await api.cleanup()
+        if result_store:
+            await result_store.close()
+        if verifier.dns_cache:
+            await verifier.dns_cache.shutdown()
+        logger.close()
+
 async def main():
     parser = argparse.ArgumentParser(description="UltraLinkVerifier: Validate massive URL lists.")
-    parser.add_argument("--input", default="urls.txt", help="Input file with URLs")
+    parser.add_argument("--input", default="urls.txt", help="Input file with URLs (.gz/.zst, .csv/.jsonl, or - for stdin)")
     parser.add_argument("--output", default="results/", help="Output directory")
     parser.add_argument("--config", default="config.yaml", help="Config file path")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument("--quiet", action="store_true", help="Only show the progress bar and the summary")
+    parser.add_argument("--resume", metavar="OUTPUT_DIR", help="Resume an interrupted run from its output directory")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (URLs are split between them by host)")
+    parser.add_argument("--serve", metavar="ADDRESS", help="Run as a service taking batches over HTTP on [HOST:]PORT or a Unix socket path")
     args = parser.parse_args()
+    if args.serve and (args.workers > 1 or args.resume):
+        parser.error("--serve can't be combined with --workers or --resume")
 
     # Configure logging
     if args.debug:
@@ -32,32 +71,131 @@ async def main():
         config = yaml.safe_load(f)
 
     # Initialize components
-    logger = Logger()
+    logger = Logger(
+        level="debug" if args.debug else config.get('log_level', 'info'),
+        quiet=args.quiet,
+        success_rate=config.get('log_success_rate'),
+        log_file=config.get('log_file'),
+        log_format=config.get('log_format', 'plain')
+    )
+    if args.serve:
+        await run_service(config, logger, args.serve)
+        return
     result_folder = ResultFolder(args.output)
-    output_dir = result_folder.create()
-    output_writer = OutputWriter(output_dir)
-    chunk_reader = ChunkReader(args.input, config['chunk_size'])
-    scraper = cloudscraper.create_scraper(browser={"browser": "chrome", "platform": "windows", "mobile": False})
-    verifier = URLVerifier(
-        config['timeout'],
-        config['max_retries'],
-        config['concurrency'],
-        config['status_codes'],
-        logger,
-        use_get_fallback=config.get('use_get_fallback', False),
-        disable_ssl_verification=config.get('disable_ssl_verification', False),
-        scraper=scraper
+    input_file, start, state = args.input, 0, None
+    if args.resume:
+        output_dir = result_folder.resume(args.resume)
+        state = Checkpoint.load(output_dir)
+        input_file, start = state['input'], state['offset']
+    else:
+        output_dir = result_folder.create()
+    output_writer = OutputWriter(
+        output_dir,
+        structured_format=config.get('structured_output'),
+        buffer_size=config.get('output_buffer_size', 1000),
+        flush_interval=config.get('output_flush_interval', 1.0)
     )
+    chunk_reader = ChunkReader(input_file, config['chunk_size'], input_format=config.get('input_format'),
+                               url_column=config.get('url_column', 'url'))
+    checkpoint = Checkpoint(output_dir, input_file, interval=config.get('checkpoint_interval', 5),
+                            position=lambda: chunk_reader.position)
+    if state:
+        output_writer.truncate(state.get('files', {}))
+        checkpoint.resume_from(state)
+        logger.info(f"Resuming {input_file} from byte {start} into {output_dir}")
+    result_store = None
+    if config.get('result_store'):
+        result_store = ResultStore(config['result_store'], ttl=config.get('result_ttl', 86400),
+                                   failure_ttl=config.get('result_failure_ttl', 0))
+    deduplicator = None
+    if config.get('dedup'):
+        deduplicator = Deduplicator(
+            config['dedup'],
+            capacity=config.get('dedup_capacity', 1 << 16),
+            error_rate=config.get('dedup_error_rate', 0.001)
+        )
+    if args.workers > 1:
+        # The parent only reads, deduplicates and writes; the worker processes build their own checkers.
+        verifier = URLVerifier.from_config(config, logger, dns_cache=None, circuit_breaker=None, concurrency_limiter=None,
+                                           result_store=result_store, deduplicator=deduplicator)
+        runner = ShardedRunner(config, args.workers, verifier, debug=args.debug)
+        metrics_snapshot = runner.metrics_snapshot
+    else:
+        verifier = runner = URLVerifier.from_config(config, logger, result_store=result_store, deduplicator=deduplicator,
+                                                    spill_dir=output_dir)
+        metrics_snapshot = verifier.metrics.snapshot if verifier.metrics else None
 
     logger.info("Starting UltraLinkVerifier...")
-    with Progress() as progress:
-        task = progress.add_task("[cyan]Processing URLs...", total=None)
-        async with output_writer:
-            async with verifier:
-                async for chunk in chunk_reader.read_chunks():
-                    await verifier.process_urls(chunk, output_writer)
-                    progress.update(task, advance=len(chunk))
+    if result_store:
+        await result_store.open()
+    exporter = metrics_server = None
+    if metrics_snapshot:
+        exporter = asyncio.create_task(metrics.export(output_dir, metrics_snapshot, config.get('metrics_interval', 5)))
+        if config.get('metrics_port'):
+            metrics_server = await metrics.serve(metrics_snapshot, port=config['metrics_port'])
+            logger.info(f"Serving Prometheus metrics on http://127.0.0.1:{config['metrics_port']}/metrics")
+    try:
+        progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            TextColumn("{task.completed} URLs, {task.fields[rate]:.0f}/s"),
+            TextColumn("[green]{task.fields[ok]} ok[/] [red]{task.fields[failed]} failed[/]"),
+            TextColumn("{task.fields[in_flight]} in flight"),
+            TimeElapsedColumn(),
+            console=logger.console
+        )
+        with progress:
+            task = progress.add_task("[cyan]Processing URLs...", total=None, rate=0, ok=0, failed=0, in_flight=0)
+            completed = 0
+
+            def finished(job):
+                nonlocal completed
+                checkpoint.done(job)
+                completed += 1
+
+            async def refresh(interval=0.5):
+                # Redraw from counters twice a second instead of on every URL.
+                last, last_at = completed, time.monotonic()
+                while True:
+                    await asyncio.sleep(interval)
+                    now = time.monotonic()
+                    progress.update(task, completed=completed, rate=(completed - last) / (now - last_at),
+                                    ok=output_writer.written[True], failed=output_writer.written[False],
+                                    in_flight=checkpoint.in_flight)
+                    last, last_at = completed, now
+
+            async with output_writer:
+                saver = asyncio.create_task(checkpoint.run(output_writer))
+                refresher = asyncio.create_task(refresh())
+                try:
+                    urls = checkpoint.track(chunk_reader.read_urls(start, with_offsets=True))
+                    if runner is verifier:
+                        async with verifier:
+                            await verifier.process_stream(urls, output_writer, on_done=finished)
+                    else:
+                        await runner.process_stream(urls, output_writer, on_done=finished)
+                except asyncio.CancelledError:
+                    # Interrupted: keep what was checked so far for --resume.
+                    await checkpoint.save(output_writer)
+                    raise
+                finally:
+                    saver.cancel()
+                    refresher.cancel()
+                    progress.update(task, completed=completed, ok=output_writer.written[True],
+                                    failed=output_writer.written[False], in_flight=checkpoint.in_flight)
+                await checkpoint.save(output_writer, complete=True)
+    finally:
+        if exporter:
+            exporter.cancel()
+            await asyncio.to_thread(metrics.write_snapshot, output_dir, metrics_snapshot())
+        if metrics_server:
+            await metrics_server.cleanup()
+        if result_store:
+            await result_store.close()
+        if verifier.dns_cache:
+            await verifier.dns_cache.shutdown()
     logger.info("Processing complete.")
+    logger.close()
 
 if __name__ == "__main__":
     # Set event loop policy for Windows to avoid ProactorEventLoop issues
@@ -67,8 +205,14 @@ if __name__ == "__main__":
     # Create and run event loop explicitly
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
+    task = loop.create_task(main())
+    if not sys.platform.startswith("win"):
+        # Ctrl-C cancels main() so it can stop worker processes, flush results and save a checkpoint.
+        loop.add_signal_handler(signal.SIGINT, task.cancel)
     try:
-        loop.run_until_complete(main())
+        loop.run_until_complete(task)
+    except asyncio.CancelledError:
+        print("Interrupted. Continue with --resume <output directory>.")
     finally:
         loop.run_until_complete(loop.shutdown_asyncgens())
         loop.close()
\ No newline at end of file
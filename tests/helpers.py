@@ -0,0 +1,44 @@
+import asyncio
+from core.logger import Logger
+from core.verifier import URLVerifier
+
+
+class ListWriter:
+    """Output writer that keeps results in memory."""
+
+    def __init__(self):
+        self.results = []
+
+    @property
+    def working(self):
+        return [result.url for result in self.results if result.ok]
+
+    @property
+    def notworking(self):
+        return [result.url for result in self.results if not result.ok]
+
+    async def write_result(self, result):
+        self.results.append(result)
+
+
+class RecordingVerifier(URLVerifier):
+    """Verifier that records checks instead of touching the network.
+
+    Every URL works except those containing "bad"; results are only written
+    when there is an output writer.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(timeout=1, max_retries=0, valid_status_codes=[200], logger=Logger(quiet=True), **kwargs)
+        self.checked = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def check_url(self, url, output_writer, attempt=0, headers=None, started=None):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.checked.append(url)
+        self.in_flight -= 1
+        if output_writer is not None:
+            await self.record(output_writer, url, "bad" not in url, None, category="status", status=200, method="HEAD")
\ No newline at end of file
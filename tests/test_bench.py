@@ -0,0 +1,41 @@
+import asyncio
+import aiohttp
+from bench.server import PROFILES, StandIn, host_address, host_index, kind_for, start
+
+
+def test_host_kinds_follow_profile_weights():
+    weights = PROFILES["mixed"]
+    kinds = [kind_for(i, weights) for i in range(10000)]
+    assert kinds == [kind_for(i, weights) for i in range(10000)]
+    assert abs(kinds.count("ok") / len(kinds) - weights["ok"]) < 0.02
+    assert host_index(host_address(70000)) == 70000
+
+
+def test_stand_in_injects_faults():
+    weights = PROFILES["faulty"]
+    hosts = {}
+    for i in range(1000):
+        hosts.setdefault(kind_for(i, weights), host_address(i))
+
+    async def run():
+        runner, port, _ = await start(StandIn(weights))
+        try:
+            async with aiohttp.ClientSession() as session:
+                url = lambda kind: f"http://{hosts[kind]}:{port}/page/1"
+                async with session.head(url("ok")) as response:
+                    assert response.status == 200
+                async with session.head(url("404")) as response:
+                    assert response.status == 404
+                async with session.head(url("head_reject")) as response:
+                    assert response.status == 403
+                async with session.get(url("head_reject")) as response:
+                    assert response.status == 200
+                try:
+                    async with session.get(url("reset")):
+                        raise AssertionError("expected the connection to be dropped")
+                except aiohttp.ClientConnectionError:
+                    pass
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
\ No newline at end of file
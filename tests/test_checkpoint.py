@@ -0,0 +1,118 @@
+import asyncio
+import tempfile
+from pathlib import Path
+from core.checkpoint import Checkpoint
+from core.chunk_reader import ChunkReader
+from core.output_writer import OutputWriter
+from core.records import Job
+
+
+def test_read_urls_reports_byte_offsets_and_resumes_mid_file():
+    async def run(path):
+        reader = ChunkReader(path, 10)
+        entries = [entry async for entry in reader.read_urls(with_offsets=True)]
+        assert entries == [(0, "a.test"), (8, "b.test"), (16, "c.test")]
+        assert reader.position == path.stat().st_size
+        assert [url async for url in reader.read_urls(start=8)] == ["b.test", "c.test"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "urls.txt"
+        path.write_bytes(b"a.test\r\nb.test\n\nc.test\n")
+        asyncio.run(run(path))
+
+
+def test_crash_and_resume_neither_loses_nor_duplicates_results():
+    async def run(tmp):
+        input_file = Path(tmp) / "urls.txt"
+        input_file.write_text("".join(f"https://{i}.test/\n" for i in range(6)))
+        output_dir = Path(tmp) / "out"
+        output_dir.mkdir()
+
+        # First run: 0, 1 and 3 finish, 2 is still in flight at the checkpoint,
+        # 4 finishes after it and then the process dies.
+        reader = ChunkReader(input_file, 10)
+        checkpoint = Checkpoint(output_dir, input_file, position=lambda: reader.position)
+        async with OutputWriter(output_dir) as writer:
+            jobs = [Job(url, offset=offset) async for offset, url in checkpoint.track(reader.read_urls(with_offsets=True))]
+            for i in (0, 1, 3):
+                await writer.write_working(jobs[i].url)
+                checkpoint.done(jobs[i])
+            await checkpoint.save(writer)
+            await writer.write_working(jobs[4].url)
+            checkpoint.done(jobs[4])
+            await writer.flush()
+
+        state = Checkpoint.load(output_dir)
+        assert state["offset"] == jobs[2].offset
+        assert state["read_to"] == input_file.stat().st_size
+        assert sorted(state["in_flight"]) == [[job.offset, job.url] for job in (jobs[2], jobs[4], jobs[5])]
+
+        # Resume: output is cut back to the checkpoint and only 2, 4 and 5 are read.
+        writer = OutputWriter(output_dir)
+        writer.truncate(state["files"])
+        reader = ChunkReader(input_file, 10)
+        checkpoint = Checkpoint(output_dir, input_file, position=lambda: reader.position)
+        checkpoint.resume_from(state)
+        async with writer:
+            async for offset, url in checkpoint.track(reader.read_urls(state["offset"], with_offsets=True)):
+                await writer.write_working(url)
+                checkpoint.done(Job(url, offset=offset))
+            await checkpoint.save(writer, complete=True)
+
+        lines = (output_dir / "working.txt").read_text().splitlines()
+        assert sorted(lines) == sorted(f"https://{i}.test/" for i in range(6))
+        assert Checkpoint.load(output_dir)["complete"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_done_lines_past_a_stuck_one_are_not_listed():
+    async def run(tmp):
+        input_file = Path(tmp) / "urls.txt"
+        input_file.write_text("".join(f"https://{i}.test/\n" for i in range(1000)))
+        reader = ChunkReader(input_file, 10)
+        checkpoint = Checkpoint(tmp, input_file, position=lambda: reader.position)
+        jobs = [Job(url, offset=offset) async for offset, url in checkpoint.track(reader.read_urls(with_offsets=True))]
+        for job in jobs[1:500] + jobs[501:]:
+            checkpoint.done(job)
+        state = checkpoint.snapshot()
+        assert state["offset"] == 0 and state["read_to"] == input_file.stat().st_size
+        assert state["in_flight"] == [[0, jobs[0].url], [jobs[500].offset, jobs[500].url]]
+
+        # Resuming that checkpoint only reads the two lines again, and a checkpoint
+        # taken before they finish still lists them.
+        reader = ChunkReader(input_file, 10)
+        checkpoint = Checkpoint(tmp, input_file, position=lambda: reader.position)
+        checkpoint.resume_from(state)
+        redone = [entry async for entry in checkpoint.track(reader.read_urls(state["offset"], with_offsets=True))]
+        assert redone == [(0, jobs[0].url), (jobs[500].offset, jobs[500].url)]
+        checkpoint.done(Job(jobs[0].url, offset=0))
+        state = checkpoint.snapshot()
+        assert state["offset"] == jobs[500].offset and state["in_flight"] == [[jobs[500].offset, jobs[500].url]]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+
+def test_no_checkpoint_lands_between_a_result_and_its_done():
+    async def run(tmp):
+        done = set()
+        async with OutputWriter(tmp, buffer_size=1, flush_interval=60) as writer:
+            async def writes():
+                for i in range(200):
+                    await writer.write_working(f"https://{i}.test/")
+                    done.add(i)
+
+            async def checkpoints():
+                while True:
+                    await writer.sync(lambda: snapshots.append(writer.written[True] - len(done)))
+
+            snapshots = []
+            syncing = asyncio.create_task(checkpoints())
+            await writes()
+            syncing.cancel()
+        assert snapshots and not any(snapshots)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
\ No newline at end of file
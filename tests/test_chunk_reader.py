@@ -0,0 +1,59 @@
+import asyncio
+import gzip
+import tempfile
+from pathlib import Path
+from core.chunk_reader import ChunkReader, Cursor
+
+
+async def read(reader, **kwargs):
+    return [entry async for entry in reader.read_urls(with_offsets=True, **kwargs)]
+
+
+def test_reads_gzip_csv_and_jsonl_with_offsets():
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = Path(tmp) / "urls.txt"
+        plain.write_bytes(b"a.test\nb.test\n\nc.test")
+        packed = Path(tmp) / "urls.txt.gz"
+        packed.write_bytes(gzip.compress(plain.read_bytes()))
+        table = Path(tmp) / "urls.csv"
+        table.write_bytes(b"id,link\n1,a.test\n2,\"b.test\"\n3\n")
+        lines = Path(tmp) / "urls.jsonl"
+        lines.write_bytes(b'{"url": "a.test"}\nnot json\n{"url": "b.test", "id": 2}\n')
+
+        expected = [(0, "a.test"), (7, "b.test"), (15, "c.test")]
+        assert asyncio.run(read(ChunkReader(plain, 10, block_size=4))) == expected
+        assert asyncio.run(read(ChunkReader(packed, 10, block_size=4))) == expected
+        assert asyncio.run(read(ChunkReader(packed, 10), start=7)) == expected[1:]
+
+        reader = ChunkReader(table, 10, url_column="link")
+        assert asyncio.run(read(reader)) == [(8, "a.test"), (17, "b.test")]
+        assert reader.skipped == 1
+        assert asyncio.run(read(reader, start=17)) == [(17, "b.test")]
+
+        reader = ChunkReader(lines, 10)
+        assert reader.input_format == "jsonl"
+        assert asyncio.run(read(reader)) == [(0, "a.test"), (27, "b.test")]
+        assert reader.position == lines.stat().st_size
+
+
+def test_split_ranges_cover_every_line_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "urls.txt"
+        path.write_text("".join(f"https://{i}.test/{'x' * (i % 7)}\n" for i in range(1000)))
+        reader = ChunkReader(path, 10, block_size=256)
+        ranges = reader.split(4)
+        assert len(ranges) == 4 and ranges[0][0] == 0 and ranges[-1][1] == path.stat().st_size
+
+        # One reader, several ranges at once: each read keeps its own position.
+        cursors = [Cursor() for _ in ranges]
+
+        async def run():
+            return await asyncio.gather(*(read(reader, start=start, end=end, cursor=cursor)
+                                          for (start, end), cursor in zip(ranges, cursors)))
+
+        parts = asyncio.run(run())
+        assert all(parts)
+        assert [cursor.position for cursor in cursors] == [end for _, end in ranges]
+        assert reader.position == 0
+        assert sorted(url for part in parts for _, url in part) == sorted(
+            f"https://{i}.test/{'x' * (i % 7)}" for i in range(1000))
\ No newline at end of file
@@ -0,0 +1,59 @@
+import time
+from core.circuit_breaker import CircuitBreaker, origin_key, OPEN, HALF_OPEN, CLOSED
+
+
+def test_origin_key_fills_default_port():
+    assert origin_key("https://Example.com/a") == "https://example.com:443"
+    assert origin_key("http://example.com:8080/") == "http://example.com:8080"
+
+
+def test_opens_after_threshold_and_short_circuits():
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    origin = "https://down.test:443"
+    for _ in range(2):
+        breaker.record_failure(origin, "Connection Error")
+        assert breaker.allow(origin) is None
+    breaker.record_failure(origin, "Timeout Error")
+    assert breaker.state(origin) == OPEN
+    reason = breaker.allow(origin)
+    assert "Timeout Error" in reason
+    assert breaker.short_circuited == 1
+
+
+def test_success_resets_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2)
+    origin = "https://flaky.test:443"
+    breaker.record_failure(origin, "x")
+    breaker.record_success(origin)
+    breaker.record_failure(origin, "x")
+    assert breaker.state(origin) == CLOSED
+
+
+def test_half_open_probe_after_cooldown():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    origin = "https://down.test:443"
+    breaker.record_failure(origin, "x")
+    assert breaker.allow(origin)
+    time.sleep(0.06)
+    assert breaker.allow(origin) is None
+    assert breaker.state(origin) == HALF_OPEN
+    # Only one probe at a time.
+    assert breaker.allow(origin)
+    breaker.record_failure(origin, "still down")
+    assert breaker.state(origin) == OPEN
+    time.sleep(0.06)
+    assert breaker.allow(origin) is None
+    breaker.record_success(origin)
+    assert breaker.state(origin) == CLOSED
+    assert "1 circuits opened" in breaker.summary()[0]
+
+
+def test_one_off_failures_are_forgotten_past_max_origins():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60, max_origins=100)
+    breaker.record_failure("https://down.test:443", "Timeout Error")
+    breaker.record_failure("https://down.test:443", "Timeout Error")
+    for i in range(1000):
+        breaker.record_failure(f"https://host{i}.test:443", "Timeout Error")
+    assert len(breaker._circuits) <= 100
+    assert breaker.state("https://down.test:443") == OPEN
+    assert breaker.state("https://host999.test:443") == CLOSED and "https://host999.test:443" in breaker._circuits
\ No newline at end of file
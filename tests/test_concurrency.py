@@ -0,0 +1,64 @@
+import asyncio
+import aiohttp
+from core.concurrency import AdaptiveLimiter, is_congestion
+
+
+async def hold(limiter, seconds, error=None):
+    try:
+        async with limiter:
+            await asyncio.sleep(seconds)
+            if error:
+                raise error
+    except type(error or Exception):
+        pass
+
+
+def test_limit_grows_while_requests_wait_and_stays_in_bounds():
+    reasons = []
+    limiter = AdaptiveLimiter(2, min_limit=1, max_limit=6, window=10, tolerance=100, fd_reserve=0, log=reasons.append)
+
+    async def run():
+        peak = 0
+
+        async def tracked():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                assert limiter.in_flight <= limiter.limit
+                await asyncio.sleep(0.002)
+
+        await asyncio.gather(*(tracked() for _ in range(300)))
+        return peak
+
+    peak = asyncio.run(run())
+    assert limiter.limit == 6 and peak == 6
+    assert limiter.adjustments == len(reasons) and "waiting" in reasons[0]
+
+
+def test_limit_backs_off_on_timeouts():
+    limiter = AdaptiveLimiter(20, min_limit=4, max_limit=40, window=10, fd_reserve=0)
+
+    async def run():
+        for _ in range(3):
+            await asyncio.gather(*(hold(limiter, 0, asyncio.TimeoutError()) for _ in range(10)))
+
+    asyncio.run(run())
+    assert limiter.limit == 8 and limiter.lowest == 8
+    assert "timed out" in limiter.stats()["last_reason"]
+
+
+def test_latency_rise_shrinks_the_limit():
+    limiter = AdaptiveLimiter(20, min_limit=1, max_limit=40, window=10, fd_reserve=0)
+
+    async def run():
+        await asyncio.gather(*(hold(limiter, 0.01) for _ in range(10)))
+        await asyncio.gather(*(hold(limiter, 0.05) for _ in range(10)))
+
+    asyncio.run(run())
+    assert limiter.limit < 20 and "median latency" in limiter.last_reason
+
+
+def test_dns_and_refused_connections_are_not_congestion():
+    refused = aiohttp.ClientConnectorError(None, ConnectionRefusedError(111, "refused"))
+    assert is_congestion(asyncio.TimeoutError()) and is_congestion(aiohttp.ServerDisconnectedError())
+    assert not is_congestion(refused) and not is_congestion(ValueError())
\ No newline at end of file
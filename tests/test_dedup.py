@@ -0,0 +1,96 @@
+import asyncio
+from core.dedup import Deduplicator, FingerprintTable, canonical_url, fingerprint
+from core.records import CheckResult, Job
+from tests.helpers import ListWriter
+
+
+def test_canonical_url_folds_near_duplicates():
+    variants = [
+        "https://www.Example.com/a/",
+        "HTTPS://example.COM:443/a",
+        "https://example.com/a#top",
+    ]
+    assert {canonical_url(url) for url in variants} == {"https://example.com/a"}
+    assert canonical_url("https://example.com") == "https://example.com/"
+    assert canonical_url("http://example.com:8080/?q=1") == "http://example.com:8080/?q=1"
+    assert fingerprint(variants[0]) == fingerprint(variants[1])
+
+
+def test_fingerprint_table_grows_and_keeps_values():
+    table = FingerprintTable(capacity=4)
+    for key in range(1, 1000):
+        table.set(key * 0x9E3779B97F4A7C15 % (1 << 64) or 1, key)
+    assert len(table) == 999
+    assert table.get(500 * 0x9E3779B97F4A7C15 % (1 << 64)) == 500
+    assert table.get(12345) is None
+
+
+def test_fingerprint_table_grows_a_little_at_a_time():
+    table = FingerprintTable(capacity=4)
+    expected = {}
+    keys = [key * 0x9E3779B97F4A7C15 % (1 << 64) or 1 for key in range(1, 20000)]
+    for n, key in enumerate(keys, 1):
+        table.set(key, n)
+        expected[key] = n
+        if n % 7 == 0:
+            # Overwrites while a grow is still moving entries win over the old copy.
+            table.set(keys[n // 2], 99)
+            expected[keys[n // 2]] = 99
+        if table._old is not None:
+            assert table._cursor <= len(table._old[0])
+            assert len(table) == len(expected)
+    assert len(table) == len(expected)
+    assert all(table.get(key) == value for key, value in expected.items())
+
+
+def run_pipeline(deduplicator, urls):
+    """Feed jobs through the filter, "checking" each admitted job immediately."""
+    async def run():
+        writer = ListWriter()
+        done = []
+        resolving = deduplicator.resolving(writer, done.append)
+
+        async def jobs():
+            for url in urls:
+                yield Job(url)
+
+        admitted = []
+        async for job in deduplicator.filter(jobs(), resolving, done.append):
+            admitted.append(job.url)
+            await resolving.write_result(CheckResult(job.url, "dead" not in job.url, status=200 if "dead" not in job.url else 404,
+                                                     category=None if "dead" not in job.url else "status", method="HEAD"))
+        return admitted, writer.results, done
+    return asyncio.run(run())
+
+
+def test_duplicates_get_copied_results_without_a_check():
+    for mode in ("exact", "bloom"):
+        urls = ["https://a.test/x", "https://www.a.test/x/", "https://dead.test/", "https://dead.test:443/", "https://a.test/x#f"]
+        admitted, results, done = run_pipeline(Deduplicator(mode, capacity=1000), urls)
+        assert admitted == ["https://a.test/x", "https://dead.test/"]
+        by_url = {r.url: r for r in results}
+        assert set(by_url) == set(urls)
+        assert by_url["https://www.a.test/x/"].ok and by_url["https://www.a.test/x/"].method == "duplicate"
+        assert not by_url["https://dead.test:443/"].ok
+        assert by_url["https://dead.test:443/"].category == "status"
+        assert len(done) == 3
+
+
+def test_duplicates_of_in_flight_urls_wait_for_the_result():
+    async def run():
+        deduplicator = Deduplicator("exact")
+        writer = ListWriter()
+        resolving = deduplicator.resolving(writer)
+
+        async def jobs():
+            for url in ["https://a.test/", "https://a.test", "https://A.test/"]:
+                yield Job(url)
+
+        admitted = [job async for job in deduplicator.filter(jobs(), resolving)]
+        assert [job.url for job in admitted] == ["https://a.test/"]
+        assert writer.results == []
+        await resolving.write_result(CheckResult("https://a.test/", True, status=301, method="HEAD"))
+        assert [r.url for r in writer.results] == ["https://a.test", "https://A.test/", "https://a.test/"]
+        assert all(r.status == 301 for r in writer.results)
+        assert deduplicator.duplicates == 2
+    asyncio.run(run())
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+import socket
+from core.dns_cache import DNSCache
+from core.logger import Logger
+from core.verifier import URLVerifier
+from tests.helpers import ListWriter
+
+
+class FakeResolver:
+    """In-process resolver: known hosts map to 127.0.0.1, the rest are NXDOMAIN."""
+
+    def __init__(self, hosts):
+        self.hosts = set(hosts)
+        self.calls = []
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        self.calls.append(host)
+        await asyncio.sleep(0)
+        if host not in self.hosts:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return [{"hostname": host, "host": "127.0.0.1", "port": port,
+                 "family": socket.AF_INET, "proto": 0, "flags": 0}]
+
+    async def close(self):
+        pass
+
+
+def test_positive_entries_are_cached_and_lookups_coalesced():
+    async def run():
+        fake = FakeResolver(["ok.test"])
+        cache = DNSCache(resolver=fake)
+        results = await asyncio.gather(*(cache.resolve("ok.test", 443) for _ in range(5)))
+        assert fake.calls == ["ok.test"]
+        assert all(r[0]["port"] == 443 for r in results)
+        assert (await cache.resolve("ok.test", 80))[0]["port"] == 80
+        assert fake.calls == ["ok.test"]
+    asyncio.run(run())
+
+
+def test_negative_entries_fail_fast():
+    async def run():
+        fake = FakeResolver([])
+        cache = DNSCache(resolver=fake)
+        for _ in range(3):
+            try:
+                await cache.resolve("dead.test", 443)
+            except OSError:
+                pass
+        assert fake.calls == ["dead.test"]
+        assert cache.failure("dead.test")
+    asyncio.run(run())
+
+
+def test_prefetch_resolves_unique_hosts_once():
+    async def run():
+        fake = FakeResolver(["a.test"])
+        cache = DNSCache(resolver=fake)
+        await cache.prefetch(["a.test", "a.test", "b.test", "127.0.0.1", ""])
+        assert sorted(fake.calls) == ["a.test", "b.test"]
+        assert cache.failure("b.test") and not cache.failure("a.test")
+    asyncio.run(run())
+
+
+def test_unresolvable_host_skips_http():
+    async def run():
+        cache = DNSCache(resolver=FakeResolver([]))
+        await cache.prefetch(["dead.test"])
+        verifier = URLVerifier(timeout=1, max_retries=3, concurrency=2, valid_status_codes=[200],
+                               logger=Logger(), dns_cache=cache)
+        writer = ListWriter()
+        # No session is opened: reaching the HTTP path would raise.
+        await verifier.check_url("dead.test/page", writer)
+        assert writer.notworking == ["https://dead.test/page"]
+        assert verifier.failure_counts["dns"] == 1
+    asyncio.run(run())
\ No newline at end of file
@@ -0,0 +1,134 @@
+import asyncio
+import tempfile
+import threading
+import time
+from pathlib import Path
+from core.fallback import BrowserPool, Escalation, EscalationQueue, ScraperPool
+from core.logger import Logger
+from core.records import Job
+from core.verifier import URLVerifier
+
+
+class FakeDriver:
+    instances = []
+
+    def __init__(self):
+        self.pages = 0
+        self.quit_called = False
+        self.thread = threading.get_ident()
+        FakeDriver.instances.append(self)
+
+    def get(self, url):
+        if "crash" in url:
+            raise RuntimeError("tab crashed")
+        self.pages += 1
+        self.page_source = f"<html><title>ok</title>200 {url}</html>"
+        self.title = "ok"
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_browser_pool_reuses_and_recycles_drivers():
+    FakeDriver.instances = []
+    pool = BrowserPool(size=1, factory=FakeDriver, max_pages=3, page_wait=0)
+
+    async def run():
+        for i in range(4):
+            source, title = await pool.load(f"https://a.test/{i}")
+            assert f"https://a.test/{i}" in source and title == "ok"
+        try:
+            await pool.load("https://crash.test/")
+        except RuntimeError:
+            pass
+        await pool.load("https://a.test/again")
+
+    asyncio.run(run())
+    pool.close()
+    # Recycled after 3 pages, again after the crash.
+    assert [d.pages for d in FakeDriver.instances] == [3, 1, 1]
+    assert all(d.quit_called for d in FakeDriver.instances)
+    assert pool.started == 3 and pool.recycled == 2
+
+
+def test_scraper_pool_keeps_one_scraper_per_thread():
+    class FakeScraper:
+        def get(self, url, **kwargs):
+            time.sleep(0.01)
+            return (id(self), threading.get_ident())
+
+    pool = ScraperPool(size=2, factory=FakeScraper)
+
+    async def run():
+        return await asyncio.gather(*(pool.get(f"https://a.test/{i}") for i in range(10)))
+
+    pairs = set(asyncio.run(run()))
+    pool.close()
+    assert len(pairs) <= 2
+    assert len({scraper for scraper, _ in pairs}) == len({thread for _, thread in pairs})
+
+
+class EscalatingVerifier(URLVerifier):
+    """Sends one URL to the fallback stage, where it is slow."""
+
+    def __init__(self, **kwargs):
+        super().__init__(timeout=1, max_retries=0, valid_status_codes=[200], logger=Logger(), **kwargs)
+        self.finished = []
+
+    async def check_url(self, url, output_writer, attempt=0, headers=None, started=None):
+        if "blocked" in url:
+            return Escalation()
+        self.finished.append(url)
+
+    async def check_url_fallback(self, url, output_writer, started=None):
+        await asyncio.sleep(0.2)
+        self.finished.append(url)
+
+
+def test_http_pass_does_not_wait_for_fallbacks():
+    verifier = EscalatingVerifier(concurrency=1)
+    done = []
+
+    async def urls():
+        yield "https://blocked.test/"
+        for i in range(5):
+            yield f"https://a.test/{i}"
+
+    asyncio.run(verifier.process_stream(urls(), None, on_done=lambda job: done.append(job.url)))
+    assert verifier.finished[-1] == "https://blocked.test/"
+    assert done[-1] == "https://blocked.test/" and len(done) == 6
+
+
+def test_escalations_past_the_limit_wait_on_disk():
+    async def run(tmp):
+        queue = EscalationQueue(maxsize=2, spill_dir=tmp)
+        for i in range(5):
+            queue.put(i, Job(f"https://a.test/{i}", offset=i * 10, started=1.5))
+        assert len(queue) == 5 and queue.spilled == 3 and len(queue._queue) == 2
+        assert len(list(Path(tmp).glob("escalations-*.jsonl"))) == 1
+        taken = [await queue.get() for _ in range(3)]
+        queue.put(5, Job("https://a.test/5"))
+        queue.close()
+        while (entry := await queue.get()) is not None:
+            taken.append(entry)
+        queue.discard()
+        return taken
+
+    with tempfile.TemporaryDirectory() as tmp:
+        taken = asyncio.run(run(tmp))
+        assert not list(Path(tmp).iterdir())
+    assert [due for due, _ in taken] == [0, 1, 2, 3, 4, 5]
+    assert taken[3][1] == Job("https://a.test/3", offset=30, started=1.5)
+
+
+def test_spilled_escalations_are_checked():
+    verifier = EscalatingVerifier(concurrency=2, escalation_queue_size=1)
+    done = []
+
+    async def urls():
+        for i in range(5):
+            yield f"https://blocked.test/{i}"
+        yield "https://a.test/"
+
+    asyncio.run(verifier.process_stream(urls(), None, on_done=lambda job: done.append(job.url)))
+    assert sorted(done) == ["https://a.test/"] + [f"https://blocked.test/{i}" for i in range(5)]
\ No newline at end of file
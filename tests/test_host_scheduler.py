@@ -0,0 +1,106 @@
+import asyncio
+import time
+from core.host_scheduler import HostScheduler, host_key
+
+
+def test_host_key():
+    assert host_key("https://Example.COM:8443/a") == "example.com"
+    assert host_key("not a url") == ""
+
+
+def test_interleaves_hosts_and_caps_per_host():
+    async def run():
+        scheduler = HostScheduler(per_host_limit=1)
+        for i in range(3):
+            await scheduler.put("a", f"a{i}")
+        await scheduler.put("b", "b0")
+        first = await scheduler.get()
+        second = await scheduler.get()
+        # "a" is at its limit, so the next item must come from "b".
+        assert (first[0], second[0]) == ("a", "b")
+        scheduler.release("b")
+        scheduler.task_done()
+        blocked = asyncio.ensure_future(scheduler.get())
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        scheduler.release("a")
+        scheduler.task_done()
+        assert (await blocked) == ("a", "a1")
+    asyncio.run(run())
+
+
+def test_get_returns_none_once_drained():
+    async def run():
+        scheduler = HostScheduler(per_host_limit=2)
+        await scheduler.put("a", 1)
+        scheduler.close()
+        host, item = await scheduler.get()
+        scheduler.release(host)
+        scheduler.task_done()
+        assert await scheduler.get() is None
+    asyncio.run(run())
+
+
+def test_delay_host_only_holds_back_that_host():
+    async def run():
+        scheduler = HostScheduler(per_host_limit=4)
+        scheduler.delay_host("slow", 0.2)
+        await scheduler.put("slow", "s")
+        await scheduler.put("fast", "f")
+        start = time.monotonic()
+        assert (await scheduler.get())[1] == "f"
+        assert (await scheduler.get())[1] == "s"
+        assert time.monotonic() - start >= 0.15
+    asyncio.run(run())
+
+
+def test_rate_limit_spaces_requests():
+    async def run():
+        scheduler = HostScheduler(per_host_limit=10, rate=20, burst=1)
+        for i in range(4):
+            await scheduler.put("a", i)
+        start = time.monotonic()
+        for _ in range(4):
+            await scheduler.get()
+        # One burst token, then three more at 20/s.
+        assert time.monotonic() - start >= 0.13
+    asyncio.run(run())
+
+def test_requeue_with_delay_lets_other_items_through():
+    async def run():
+        scheduler = HostScheduler(per_host_limit=4)
+        await scheduler.put("a", "retry")
+        await scheduler.put("a", "next")
+        scheduler.close()
+        host, item = await scheduler.get()
+        scheduler.release(host)
+        start = time.monotonic()
+        scheduler.requeue(host, item, 0.1)
+        host, item = await scheduler.get()
+        assert item == "next"
+        scheduler.release(host)
+        scheduler.task_done()
+        host, item = await scheduler.get()
+        assert item == "retry" and time.monotonic() - start >= 0.09
+        scheduler.release(host)
+        scheduler.task_done()
+        assert await scheduler.get() is None
+    asyncio.run(run())
+
+
+def test_idle_hosts_are_forgotten_once_their_bucket_refills():
+    async def run():
+        scheduler = HostScheduler(per_host_limit=1, rate=100, burst=2, max_pending=10000)
+        for i in range(500):
+            await scheduler.put(f"host{i}", i)
+            host, _ = await scheduler.get()
+            scheduler.release(host)
+            scheduler.task_done()
+        assert len(scheduler._buckets) == 500
+        await asyncio.sleep(0.05)
+        scheduler.close()
+        assert await scheduler.get() is None
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert not scheduler._buckets and not scheduler._idle
\ No newline at end of file
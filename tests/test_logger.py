@@ -0,0 +1,43 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+from core.logger import Logger
+
+
+def capture(logger):
+    logger.console.file = io.StringIO()
+    return logger.console.file
+
+
+def test_levels_quiet_and_report():
+    logger = Logger(level="warning")
+    out = capture(logger)
+    logger.info("hidden")
+    logger.warning("shown")
+    logger.close()
+    assert "hidden" not in out.getvalue() and "[!] shown" in out.getvalue()
+
+    logger = Logger(quiet=True)
+    out = capture(logger)
+    logger.error("per-url error")
+    logger.report("Summary: 1 URL")
+    logger.close()
+    assert out.getvalue().strip() == "[*] Summary: 1 URL"
+
+
+def test_success_lines_are_sampled_on_console_but_not_in_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "run.log"
+        logger = Logger(success_rate=3, log_file=path, log_format="json")
+        out = capture(logger)
+        for i in range(10):
+            logger.success(f"https://a.test/{i} — 200 OK")
+        logger.report("done")
+        logger.close()
+        lines = out.getvalue().splitlines()
+        records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len([line for line in lines if "200 OK" in line]) <= 6
+    assert any("more OK" in line for line in lines)
+    assert lines[-1] == "[*] done"
+    assert [r["level"] for r in records].count("success") == 10
\ No newline at end of file
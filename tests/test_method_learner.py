@@ -0,0 +1,87 @@
+import asyncio
+from aiohttp import web
+from core.logger import Logger
+from core.method_learner import MethodLearner
+from core.verifier import URLVerifier
+from tests.helpers import ListWriter
+
+
+def test_host_switches_to_get_after_threshold():
+    learner = MethodLearner(threshold=2)
+    learner.head_rejected("a.test")
+    assert not learner.get_only("a.test")
+    learner.head_honoured("a.test")
+    learner.head_rejected("a.test")
+    assert not learner.get_only("a.test")
+    learner.head_rejected("a.test")
+    assert learner.get_only("a.test") and not learner.get_only("b.test")
+    assert learner.stats() == {"switched": 1, "heads_skipped": 1}
+
+
+def test_head_rejecting_host_gets_range_probes_only():
+    requests = []
+
+    async def handle(request):
+        requests.append((request.method, request.headers.get("Range")))
+        if request.method == "HEAD":
+            return web.Response(status=405)
+        return web.Response(status=206, body=b"x", headers={"Content-Range": "bytes 0-0/100000"})
+
+    async def run():
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        writer = ListWriter()
+        verifier = URLVerifier(timeout=5, max_retries=0, concurrency=1, valid_status_codes=[200], logger=Logger(),
+                               use_get_fallback=True, method_learner=MethodLearner(threshold=2))
+        try:
+            async with verifier:
+                for i in range(5):
+                    await verifier.check_url(f"http://127.0.0.1:{port}/{i}", writer)
+        finally:
+            await runner.cleanup()
+        return writer.results, verifier
+
+    results, verifier = asyncio.run(run())
+    assert all(result.ok and result.status == 200 and result.method == "GET" for result in results)
+    assert [method for method, _ in requests].count("HEAD") == 2
+    assert all(range_ == "bytes=0-0" for method, range_ in requests if method == "GET")
+    assert verifier.stats()["method_learner"] == {"switched": 1, "heads_skipped": 3}
+
+
+def test_heads_in_flight_at_the_switch_do_not_switch_again():
+    requests = []
+
+    async def handle(request):
+        requests.append(request.method)
+        if request.method == "HEAD":
+            await asyncio.sleep(0.05)
+            return web.Response(status=405)
+        return web.Response(status=206, body=b"x", headers={"Content-Range": "bytes 0-0/100000"})
+
+    async def run():
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        writer = ListWriter()
+        verifier = URLVerifier(timeout=5, max_retries=0, concurrency=5, valid_status_codes=[200], logger=Logger(),
+                               use_get_fallback=True, method_learner=MethodLearner(threshold=2))
+        try:
+            async with verifier:
+                await asyncio.gather(*(verifier.check_url(f"http://127.0.0.1:{port}/{i}", writer) for i in range(5)))
+        finally:
+            await runner.cleanup()
+        return writer.results, verifier
+
+    results, verifier = asyncio.run(run())
+    assert len(results) == 5 and all(result.ok for result in results)
+    assert requests.count("HEAD") == 5
+    assert verifier.stats()["method_learner"]["switched"] == 1
\ No newline at end of file
@@ -0,0 +1,58 @@
+import asyncio
+import aiohttp
+from aiohttp import web
+from core.metrics import Histogram, Metrics, merge_snapshots, prometheus_text, quantile
+
+
+def test_histogram_quantiles():
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.observe(0.003)
+    for _ in range(10):
+        histogram.observe(2.0)
+    snapshot = histogram.to_dict()
+    assert quantile(snapshot, 0.5) <= 0.005
+    assert 1 < quantile(snapshot, 0.99) <= 2.5
+    assert quantile(Histogram().to_dict(), 0.5) is None
+
+
+def test_trace_config_records_phases_and_reuse():
+    async def run():
+        async def ok(request):
+            return web.Response(text="x" * 100)
+
+        app = web.Application()
+        app.router.add_get("/", ok)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        metrics = Metrics()
+        try:
+            async with aiohttp.ClientSession(trace_configs=[metrics.trace_config()]) as session:
+                for _ in range(3):
+                    async with session.get(f"http://127.0.0.1:{port}/") as response:
+                        await response.read()
+                try:
+                    await session.get("http://127.0.0.1:1/")
+                except aiohttp.ClientConnectionError:
+                    pass
+        finally:
+            await runner.cleanup()
+        return metrics.snapshot()
+
+    snapshot = asyncio.run(run())
+    assert snapshot["phases"]["request"]["count"] == 4
+    assert snapshot["phases"]["ttfb"]["count"] == 3
+    assert snapshot["connections"] == {"created": 1, "reused": 2}
+    assert snapshot["bytes_read"] == 300
+    assert sum(snapshot["errors"].values()) == 1
+    assert snapshot["slowest_hosts"][0]["host"] == "127.0.0.1"
+
+    merged = merge_snapshots([snapshot, snapshot])
+    assert merged["connections"] == {"created": 2, "reused": 4}
+    assert merged["phases"]["request"]["count"] == 8
+    text = prometheus_text(merged)
+    assert 'linkcheck_phase_seconds_count{phase="request"} 8' in text
+    assert 'linkcheck_phase_seconds_bucket{phase="request",le="+Inf"} 8' in text
\ No newline at end of file
@@ -0,0 +1,49 @@
+import asyncio
+import csv
+import json
+import tempfile
+from pathlib import Path
+from core.output_writer import OutputWriter
+from core.records import CheckResult
+
+
+def test_buffers_until_exit_and_writes_structured_jsonl():
+    async def run(output_dir):
+        async with OutputWriter(output_dir, structured_format="jsonl", flush_interval=60) as writer:
+            await writer.write_result(CheckResult("https://a.test/", True, status=200, method="HEAD", latency=0.1))
+            await writer.write_result(CheckResult("https://b.test/", False, status=404, category="status", method="GET"))
+            await writer.write_working("https://c.test/")
+            assert (Path(output_dir) / "working.txt").read_text() == ""
+        assert (Path(output_dir) / "working.txt").read_text() == "https://a.test/\nhttps://c.test/\n"
+        assert (Path(output_dir) / "notworking.txt").read_text() == "https://b.test/\n"
+        records = [json.loads(line) for line in (Path(output_dir) / "results.jsonl").read_text().splitlines()]
+        assert records[1]["status"] == 404 and records[1]["category"] == "status"
+        assert len(records) == 3
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        asyncio.run(run(output_dir))
+
+
+def test_flushes_when_buffer_fills():
+    async def run(output_dir):
+        async with OutputWriter(output_dir, buffer_size=2, flush_interval=60) as writer:
+            for i in range(3):
+                await writer.write_working(f"https://{i}.test/")
+            await asyncio.sleep(0.1)
+            assert len((Path(output_dir) / "working.txt").read_text().splitlines()) >= 2
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        asyncio.run(run(output_dir))
+
+
+def test_csv_header_written_once_across_runs():
+    async def run(output_dir):
+        for _ in range(2):
+            async with OutputWriter(output_dir, structured_format="csv") as writer:
+                await writer.write_not_working("https://dead.test/")
+        with open(Path(output_dir) / "results.csv", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0][0] == "url" and len(rows) == 3
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        asyncio.run(run(output_dir))
\ No newline at end of file
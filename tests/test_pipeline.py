@@ -0,0 +1,48 @@
+import asyncio
+from tests.helpers import ListWriter, RecordingVerifier
+
+
+def test_process_stream_checks_every_url():
+    verifier = RecordingVerifier(concurrency=4)
+    done = []
+
+    async def urls():
+        for i in range(50):
+            yield f"https://example.com/{i}"
+        yield "   "
+
+    asyncio.run(verifier.process_stream(urls(), None, on_done=lambda job: done.append(job)))
+    assert sorted(verifier.checked) == sorted(f"https://example.com/{i}" for i in range(50))
+    assert len(done) == 50
+    assert verifier.peak_in_flight <= 4
+
+
+def test_process_stream_applies_backpressure():
+    verifier = RecordingVerifier(concurrency=2, queue_size=3)
+    read_ahead = []
+
+    async def urls():
+        for i in range(40):
+            read_ahead.append(i - len(verifier.checked))
+            yield f"https://example.com/{i}"
+
+    asyncio.run(verifier.process_stream(urls(), None))
+    # Never more than queue + workers (+ the item being put) read ahead of results.
+    assert max(read_ahead) <= 3 + 2 + 1
+
+
+def test_malformed_lines_are_written_out_as_invalid():
+    verifier = RecordingVerifier(concurrency=2)
+    writer = ListWriter()
+    done = []
+
+    async def urls():
+        yield (0, "https://example.com/")
+        yield (20, "http://[bad/")
+        yield (33, "https://example.org/")
+
+    asyncio.run(verifier.process_stream(urls(), writer, on_done=lambda job: done.append(job.offset)))
+    assert sorted(verifier.checked) == ["https://example.com/", "https://example.org/"]
+    assert [(r.url, r.ok, r.category, r.reason) for r in writer.results if r.category == "other"] == [
+        ("http://[bad/", False, "other", "Invalid URL")]
+    assert sorted(done) == [0, 20, 33] and verifier.total_urls == 1
\ No newline at end of file
@@ -0,0 +1,98 @@
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from core.logger import Logger
+from core.records import CheckResult, Job
+from core.result_store import ResultStore
+from core.verifier import URLVerifier
+from tests.helpers import ListWriter
+
+
+def test_store_round_trip_in_batches():
+    async def run(path):
+        async with ResultStore(path, batch_size=2) as store:
+            store.add(CheckResult("https://a.test/", True, status=200, etag='"v1"'))
+            store.add(CheckResult("https://b.test/", False, status=404, category="status"))
+            store.add(CheckResult("https://c.test/", True, status=200, last_modified="Wed, 21 Oct 2015 07:28:00 GMT"))
+        async with ResultStore(path) as store:
+            found = await store.lookup(["https://a.test/", "https://b.test/", "https://c.test/", "https://d.test/"])
+        assert set(found) == {"https://a.test/", "https://b.test/", "https://c.test/"}
+        assert found["https://a.test/"].validators() == {"If-None-Match": '"v1"'}
+        assert not found["https://b.test/"].ok and found["https://b.test/"].category == "status"
+        assert found["https://c.test/"].validators() == {"If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(Path(tmp) / "cache.sqlite3"))
+
+
+def test_fresh_results_are_served_and_stale_ones_revalidated():
+    async def run(path):
+        async with ResultStore(path, ttl=3600) as store:
+            store.add(CheckResult("https://fresh.test/", True, status=200))
+            store.add(CheckResult("https://stale.test/", True, status=200, etag='"v1"'))
+            await store.flush()
+            await store._run(store._db.execute, "UPDATE results SET checked_at = ? WHERE url = ?",
+                             (time.time() - 7200, "https://stale.test/"))
+            verifier = URLVerifier(timeout=1, max_retries=0, concurrency=2, valid_status_codes=[200],
+                                   logger=Logger(), result_store=store)
+            writer = ListWriter()
+
+            async def jobs():
+                for url in ["https://fresh.test/", "https://stale.test/", "https://new.test/"]:
+                    yield Job(url)
+
+            passed = [job async for job in verifier.serve_from_store(jobs(), writer)]
+        assert [r.url for r in writer.results] == ["https://fresh.test/"]
+        assert writer.results[0].method == "cache"
+        assert verifier.cached_urls == 1 and verifier.successful_urls == 1
+        assert [(job.url, job.headers) for job in passed] == [
+            ("https://stale.test/", {"If-None-Match": '"v1"'}),
+            ("https://new.test/", None),
+        ]
+        assert verifier.is_ok(304, passed[0].headers) and not verifier.is_ok(304, None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(Path(tmp) / "cache.sqlite3"))
+
+
+def test_only_definitive_results_are_kept_for_the_full_ttl():
+    async def run(path):
+        async with ResultStore(path, ttl=3600) as store:
+            store.add(CheckResult("https://ok.test/", True, status=200))
+            store.add(CheckResult("https://gone.test/", False, status=404, category="status"))
+            store.add(CheckResult("https://slow.test/", False, category="timeout"))
+            store.add(CheckResult("https://open.test/", False, category="circuit"))
+            store.add(CheckResult("https://busy.test/", False, status=429, category="status"))
+            store.add(CheckResult("https://down.test/", False, status=503, category="status"))
+        async with ResultStore(path, ttl=3600, failure_ttl=60) as store:
+            found = await store.lookup(["https://ok.test/", "https://gone.test/", "https://slow.test/",
+                                        "https://busy.test/", "https://down.test/"])
+            store.add(CheckResult("https://slow.test/", False, category="timeout"))
+            store.add(CheckResult("https://open.test/", False, category="circuit"))
+            store.add(CheckResult("https://busy.test/", False, status=429, category="status"))
+            store.add(CheckResult("https://down.test/", False, status=503, category="status"))
+        assert set(found) == {"https://ok.test/", "https://gone.test/"}
+        async with ResultStore(path, ttl=3600, failure_ttl=60) as store:
+            found = await store.lookup(["https://slow.test/", "https://open.test/", "https://busy.test/", "https://down.test/"])
+            assert set(found) == {"https://slow.test/", "https://busy.test/", "https://down.test/"}
+            for entry in found.values():
+                assert store.is_fresh(entry) and not store.is_fresh(entry, entry.checked_at + 120)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(Path(tmp) / "cache.sqlite3"))
+
+
+def test_results_are_committed_on_a_timer():
+    async def run(path):
+        async with ResultStore(path, flush_interval=0.05) as store:
+            store.add(CheckResult("https://a.test/", True, status=200))
+            await asyncio.sleep(0.2)
+            reader = ResultStore(path)
+            await reader.open()
+            found = await reader.lookup(["https://a.test/"])
+            await reader.close()
+        assert set(found) == {"https://a.test/"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(Path(tmp) / "cache.sqlite3"))
\ No newline at end of file
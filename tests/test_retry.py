@@ -0,0 +1,103 @@
+import asyncio
+import time
+from aiohttp import web
+from core.logger import Logger
+from core.retry import Retry, RetryPolicy
+from core.verifier import URLVerifier
+from tests.helpers import ListWriter
+
+
+def test_backoff_grows_with_jitter_and_cap():
+    policy = RetryPolicy(backoff={"timeout": 1}, max_delay=5)
+    for attempt, full in [(0, 1), (1, 2), (2, 4), (5, 5)]:
+        delays = [policy.delay("timeout", attempt) for _ in range(50)]
+        assert all(full / 2 <= d <= full for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_budget_limits_retries_per_request():
+    policy = RetryPolicy(budget_ratio=0.1, budget_min=2)
+    for _ in range(10):
+        policy.request()
+    assert [policy.allow() for _ in range(4)] == [True, True, True, False]
+    assert policy.retries == 3 and policy.denied == 1
+
+
+class FlakyVerifier(URLVerifier):
+    """Fails the first attempt at every URL, then succeeds."""
+
+    def __init__(self, **kwargs):
+        super().__init__(timeout=1, max_retries=2, valid_status_codes=[200], logger=Logger(), **kwargs)
+        self.attempts = []
+
+    async def check_url(self, url, output_writer, attempt=0, headers=None, started=None):
+        self.attempts.append((url, attempt, time.monotonic()))
+        if attempt == 0:
+            return Retry(1, 0.2)
+
+
+def test_backing_off_urls_do_not_hold_workers():
+    verifier = FlakyVerifier(concurrency=1)
+
+    async def urls():
+        for i in range(3):
+            yield f"https://host{i}.test/"
+
+    start = time.monotonic()
+    asyncio.run(verifier.process_stream(urls(), None))
+    # With one worker, the first attempts all run before any backoff has passed.
+    assert [attempt for _, attempt, _ in verifier.attempts] == [0, 0, 0, 1, 1, 1]
+    assert all(at - start < 0.15 for _, attempt, at in verifier.attempts if attempt == 0)
+
+
+def test_latency_covers_every_attempt():
+    class SlowToSucceed(FlakyVerifier):
+        async def check_url(self, url, output_writer, attempt=0, headers=None, started=None):
+            if attempt == 0:
+                return Retry(1, 0.2)
+            await self.record(output_writer, url, True, started, status=200)
+
+    async def urls():
+        yield "https://host.test/"
+
+    writer = ListWriter()
+    asyncio.run(SlowToSucceed(concurrency=1).process_stream(urls(), writer))
+    assert writer.results[0].latency >= 0.1
+
+
+def test_429_with_retry_after_pauses_the_host_and_retries():
+    requests = []
+
+    async def handle(request):
+        requests.append((request.path, time.monotonic()))
+        if request.path == "/limited" and len(requests) == 1:
+            return web.Response(status=429, headers={"Retry-After": "0.3"})
+        return web.Response(status=200)
+
+    async def run():
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        writer = ListWriter()
+        verifier = URLVerifier(timeout=5, max_retries=2, concurrency=2, valid_status_codes=[200], logger=Logger())
+
+        async def urls():
+            yield f"http://127.0.0.1:{port}/limited"
+            yield f"http://127.0.0.1:{port}/other"
+
+        try:
+            async with verifier:
+                await verifier.process_stream(urls(), writer)
+        finally:
+            await runner.cleanup()
+        return writer.results
+
+    results = asyncio.run(run())
+    assert sorted((r.url.rsplit("/", 1)[1], r.ok, r.status) for r in results) == [("limited", True, 200), ("other", True, 200)]
+    # The retry waited for Retry-After.
+    limited = [at for path, at in requests if path == "/limited"]
+    assert len(limited) == 2 and limited[1] - limited[0] >= 0.25
\ No newline at end of file
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+import aiohttp
+from core.service import VerifierService, serve
+from tests.helpers import RecordingVerifier
+
+
+def test_batches_share_the_verifier_fairly():
+    async def run():
+        verifier = RecordingVerifier(concurrency=2, queue_size=4)
+        async with VerifierService(verifier) as service:
+            big = service.submit([f"https://big.test/{i}" for i in range(200)])
+            await asyncio.sleep(0.05)
+            small = service.submit(["https://small.test/1", "https://small.test/bad", "https://big.test/0"])
+            while not (big.finished and small.finished):
+                await asyncio.sleep(0.01)
+        return verifier.checked, big, small
+
+    checked, big, small = asyncio.run(run())
+    assert big.status()["done"] == 200 and big.state == "done"
+    assert [result.url for result in small.results if "small" in result.url] == ["https://small.test/1", "https://small.test/bad"]
+    assert (small.ok, len(small.results)) == (2, 3)
+    # The small batch is not stuck behind the rest of the big one.
+    assert checked.index("https://small.test/bad") < 150
+
+
+def test_api_streams_results_over_a_unix_socket():
+    async def run(path):
+        async with VerifierService(RecordingVerifier(concurrency=4)) as service:
+            api = await serve(service, path)
+            try:
+                async with aiohttp.ClientSession(connector=aiohttp.UnixConnector(path)) as session:
+                    async with session.post("http://service/jobs", data="a.test\n\nhttps://b.test/bad\n") as response:
+                        assert response.status == 201
+                        job = await response.json()
+                    async with session.get(f"http://service/jobs/{job['id']}/results") as response:
+                        results = [json.loads(line) async for line in response.content]
+                    async with session.get(f"http://service/jobs/{job['id']}") as response:
+                        status = await response.json()
+                    async with session.post("http://service/jobs", json={"urls": "nope"}) as response:
+                        assert response.status == 400
+            finally:
+                await api.cleanup()
+        return results, status
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results, status = asyncio.run(run(str(Path(tmp) / "api.sock")))
+    assert sorted((r["url"], r["ok"]) for r in results) == [("https://a.test", True), ("https://b.test/bad", False)]
+    assert status["state"] == "done" and status["ok"] == 1 and status["failed"] == 1
+
+
+def test_malformed_lines_come_back_as_invalid_results():
+    async def run(path):
+        async with VerifierService(RecordingVerifier(concurrency=2)) as service:
+            api = await serve(service, path)
+            try:
+                async with aiohttp.ClientSession(connector=aiohttp.UnixConnector(path)) as session:
+                    async with session.post("http://service/jobs", data="http://[bad/\nhttps://a.test/\n") as response:
+                        assert response.status == 201
+                        job = await response.json()
+                    async with session.get(f"http://service/jobs/{job['id']}/results") as response:
+                        return [json.loads(line) async for line in response.content]
+            finally:
+                await api.cleanup()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(run(str(Path(tmp) / "api.sock")))
+    assert sorted((r["url"], r["ok"], r["reason"]) for r in results) == [
+        ("http://[bad/", False, "Invalid URL"), ("https://a.test/", True, None)]
+    assert results[[r["url"] for r in results].index("http://[bad/")]["category"] == "other"
\ No newline at end of file
@@ -0,0 +1,72 @@
+import asyncio
+import queue
+from core.circuit_breaker import CircuitBreaker
+from core.logger import Logger
+from core.records import CheckResult, Job
+from core.sharding import ShardedRunner, ShardWriter, shard_for
+from core.verifier import URLVerifier, merge_stats
+
+
+def test_urls_of_one_host_go_to_one_shard():
+    assert shard_for("https://a.test/x", 4) == shard_for("https://a.test/y?z=1", 4)
+    shards = {shard_for(f"https://host{i}.test/", 4) for i in range(100)}
+    assert shards == {0, 1, 2, 3}
+
+
+def test_merge_stats_adds_counters_and_breakers():
+    verifiers = []
+    for origin in ("https://a.test:443", "https://b.test:443"):
+        verifier = URLVerifier(timeout=1, max_retries=0, concurrency=1, valid_status_codes=[200], logger=Logger(),
+                               circuit_breaker=CircuitBreaker(failure_threshold=1))
+        verifier.total_urls, verifier.successful_urls = 3, 2
+        verifier.failure_counts["timeout"] = 1
+        verifier.circuit_breaker.record_failure(origin, "Timeout Error")
+        verifiers.append(verifier)
+    merged = merge_stats([v.stats() for v in verifiers])
+    assert merged["total_urls"] == 6 and merged["successful_urls"] == 4
+    assert merged["failure_counts"]["timeout"] == 2
+    lines = URLVerifier.summary(merged)
+    assert "Total URLs: 6" in lines[0]
+    assert "2 origins open or half-open" in lines[1]
+
+
+def test_shard_writer_keeps_results_before_done():
+    async def run():
+        outbox = queue.Queue()
+        async with ShardWriter(outbox) as writer:
+            for i in range(5):
+                job = Job(f"https://a.test/{i}", offset=i)
+                await writer.write_result(CheckResult(job.url, True, status=200))
+                writer.done(job)
+        events = []
+        while not outbox.empty():
+            kind, batch = outbox.get()
+            assert kind == "events"
+            events += batch
+        return events
+
+    events = asyncio.run(run())
+    assert [kind for kind, _ in events] == ["result", "done"] * 5
+    assert [value.url for _, value in events[::2]] == [value.url for _, value in events[1::2]]
+
+
+def test_partial_batches_are_sent_while_the_input_is_idle():
+    async def run():
+        verifier = URLVerifier(timeout=1, max_retries=0, concurrency=1, valid_status_codes=[200], logger=Logger())
+        runner = ShardedRunner({}, 2, verifier)
+        runner._inboxes = [queue.Queue(), queue.Queue()]
+        more = asyncio.Event()
+
+        async def jobs():
+            yield Job("https://a.test/")
+            await more.wait()
+            yield Job("https://b.test/")
+
+        dispatch = asyncio.create_task(runner._dispatch(jobs()))
+        await asyncio.sleep(0.5)
+        sent = [inbox.get_nowait() for inbox in runner._inboxes if not inbox.empty()]
+        more.set()
+        await dispatch
+        return sent
+
+    assert [[job.url for job in batch] for batch in asyncio.run(run())] == [["https://a.test/"]]
\ No newline at end of file